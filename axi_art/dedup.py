@@ -0,0 +1,155 @@
+"""
+Removing segments that are drawn more than once. Neighbouring tiles, mirrored copies and shared maze walls often
+draw the same line twice, which costs plot time and puts extra ink on the paper. Every segment is reduced to the
+line it lies on (direction and offset from the origin), segments on the same line are grouped, and overlapping
+segments within a group are replaced by a single segment covering them.
+"""
+import axi
+import numpy as np
+
+from axi_art.pathset import PathSet
+
+
+def _anchored_groups(
+    values: np.ndarray, tolerance: float, breaks: np.ndarray = None
+) -> np.ndarray:
+    """
+    Number the groups of a sorted array, starting a new group wherever a value is more than tolerance past the
+    first value of the current group, or wherever breaks is set. Measuring from the first value rather than the
+    previous one stops long runs of closely spaced values from chaining into one group.
+    """
+    if breaks is None:
+        breaks = np.zeros(len(values), dtype=bool)
+    group = np.empty(len(values), dtype=int)
+    current, anchor = -1, None
+    for i, (value, broken) in enumerate(zip(values.tolist(), breaks.tolist())):
+        if broken or anchor is None or value - anchor > tolerance:
+            current, anchor = current + 1, value
+        group[i] = current
+    return group
+
+
+def line_groups(
+    starts: np.ndarray, ends: np.ndarray, tolerance: float, angle_tolerance: float
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Group segments that lie on the same line. Segments are sorted by direction and bundled so no two directions
+    in a bundle differ by more than angle_tolerance; each bundle is then sorted by offset and split the same way,
+    so no two offsets in a group differ by more than tolerance.
+    Args:
+        starts: (n, 2) array of segment starts
+        ends: (n, 2) array of segment ends
+        tolerance: Largest offset between lines counted as the same
+        angle_tolerance: Largest angle in radians between lines counted as the same
+
+    Returns: The group of each segment, and the position of each segment's start and end along its group's line
+    """
+    delta = ends - starts
+    theta = np.arctan2(delta[:, 1], delta[:, 0]) % np.pi
+    # Directions just below pi are the same lines as those just above 0, so cut the circle of directions at its
+    # widest gap instead of at 0
+    ordered = np.sort(theta)
+    gaps = np.diff(ordered, append=ordered[0] + np.pi)
+    cut = ordered[(np.argmax(gaps) + 1) % len(ordered)]
+    theta = np.where(theta < cut, theta + np.pi, theta)
+    by_angle = np.argsort(theta, kind="stable")
+    bundle = np.empty(len(theta), dtype=int)
+    bundle[by_angle] = _anchored_groups(theta[by_angle], angle_tolerance)
+    # Measure every segment against the mean direction of its bundle
+    counts = np.bincount(bundle)
+    mean = np.bincount(bundle, weights=theta) / counts
+    direction = np.stack((np.cos(mean), np.sin(mean)), axis=1)[bundle]
+    normal = direction @ [[0, 1], [-1, 0]]
+    offset = np.einsum("ij,ij->i", (starts + ends) / 2, normal)
+    by_offset = np.lexsort((offset, bundle))
+    new_bundle = np.diff(bundle[by_offset], prepend=-1) != 0
+    group = np.empty(len(theta), dtype=int)
+    group[by_offset] = _anchored_groups(offset[by_offset], tolerance, new_bundle)
+    along_start = np.einsum("ij,ij->i", starts, direction)
+    along_end = np.einsum("ij,ij->i", ends, direction)
+    return group, along_start, along_end
+
+
+def remove_duplicates(
+    paths: PathSet, tolerance: float = 1e-6, angle_tolerance: float = 1e-6
+) -> tuple[PathSet, float]:
+    """
+    Remove repeated and overlapping segments. Paths without any overlapping segment are kept whole; the others
+    are split around their overlapping segments, and each set of overlapping segments is replaced by one segment
+    spanning them, running between two of their original endpoints.
+    Args:
+        paths: The paths to clean up
+        tolerance: Distance within which segments count as overlapping
+        angle_tolerance: Angle in radians within which segments count as parallel
+
+    Returns: The remaining paths, and the drawing distance saved
+    """
+    coords, offsets = paths.coords, paths.offsets
+    # Segment i runs from point i to point i + 1 unless point i ends a path
+    is_segment = np.ones(len(coords), dtype=bool)
+    is_segment[offsets[1:][paths.lengths > 0] - 1] = False
+    segments = np.flatnonzero(is_segment)
+    lengths = np.linalg.norm(coords[segments + 1] - coords[segments], axis=1)
+    segments, lengths = segments[lengths > tolerance], lengths[lengths > tolerance]
+    if len(segments) < 2:
+        return paths, 0.0
+    starts, ends = coords[segments], coords[segments + 1]
+    group, along_start, along_end = line_groups(
+        starts, ends, tolerance, angle_tolerance
+    )
+    forwards = along_start <= along_end
+    low = np.minimum(along_start, along_end)
+    high = np.maximum(along_start, along_end)
+    order = np.lexsort((low, group))
+    replaced = np.zeros(len(coords), dtype=bool)
+    merged = []
+    saved = 0.0
+    for members in np.split(order, np.flatnonzero(np.diff(group[order])) + 1):
+        if len(members) < 2:
+            continue
+        # Sweep along the line, joining segments that overlap by more than tolerance
+        runs = [[members[0]]]
+        reach = high[members[0]]
+        for segment in members[1:]:
+            if low[segment] < reach - tolerance:
+                runs[-1].append(segment)
+                reach = max(reach, high[segment])
+            else:
+                runs.append([segment])
+                reach = high[segment]
+        for run in runs:
+            if len(run) < 2:
+                continue
+            first, last = run[np.argmin(low[run])], run[np.argmax(high[run])]
+            start = starts[first] if forwards[first] else ends[first]
+            end = ends[last] if forwards[last] else starts[last]
+            merged.append([start, end])
+            saved += lengths[run].sum() - np.linalg.norm(end - start)
+            replaced[segments[run]] = True
+    if not merged:
+        return paths, 0.0
+    # Split paths into runs of the segments that are left, keeping single point paths as they are
+    kept = np.concatenate(([False], is_segment & ~replaced, [False])).astype(int)
+    piece_starts = np.flatnonzero(np.diff(kept) == 1)
+    piece_ends = np.flatnonzero(np.diff(kept) == -1) + 1
+    singles = offsets[:-1][paths.lengths == 1]
+    piece_starts = np.concatenate((piece_starts, singles))
+    piece_ends = np.concatenate((piece_ends, singles + 1))
+    by_start = np.argsort(piece_starts, kind="stable")
+    pieces = [
+        coords[start:end]
+        for start, end in zip(piece_starts[by_start], piece_ends[by_start])
+    ]
+    return PathSet.from_paths(pieces + merged), float(saved)
+
+
+def dedup_drawing(
+    drawing: axi.Drawing, tolerance: float = 1e-6, verbose: bool = False
+) -> axi.Drawing:
+    """
+    remove_duplicates for a Drawing, optionally printing the drawing distance saved.
+    """
+    paths, saved = remove_duplicates(PathSet.from_drawing(drawing), tolerance)
+    if verbose:
+        print(f"Duplicate distance removed: {saved:.1f}")
+    return paths.to_drawing()
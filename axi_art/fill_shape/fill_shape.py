@@ -1,44 +1,244 @@
+from functools import lru_cache
+
 import numpy as np
 from axi import shapely_to_paths, Drawing
 from freetype import Face
-from shapely.geometry import MultiLineString, Polygon, Point
-from shapely.ops import split
+from shapely.affinity import translate
+from shapely.geometry import MultiPolygon, Point, Polygon
+
+# Furthest a flattened glyph curve may stray from the true outline, as a fraction of the em size
+GLYPH_TOLERANCE = 0.0025
+
+
+def flatten_bezier(control: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Sample a quadratic or cubic Bezier curve with just enough points that no chord strays more than tolerance
+    from the curve, bounding the error by the curve's second differences.
+    Args:
+        control: (3, 2) or (4, 2) array of control points
+        tolerance: Maximum distance between the curve and its chords
+
+    Returns: Points along the curve, excluding the first control point
+    """
+    degree = len(control) - 1
+    second_differences = control[:-2] - 2 * control[1:-1] + control[2:]
+    bend = degree * (degree - 1) * np.linalg.norm(second_differences, axis=1).max()
+    n = max(1, int(np.ceil(np.sqrt(bend / (8 * tolerance)))))
+    t = np.arange(1, n + 1)[:, None] / n
+    if degree == 2:
+        weights = [(1 - t) ** 2, 2 * (1 - t) * t, t**2]
+    else:
+        weights = [(1 - t) ** 3, 3 * (1 - t) ** 2 * t, 3 * (1 - t) * t**2, t**3]
+    return sum(w * p for w, p in zip(weights, control))
+
+
+def outline_contours(outline, tolerance: float) -> list[np.ndarray]:
+    """
+    Split a FreeType outline into its contours, flattening the curved segments.
+    Args:
+        outline: A freetype Outline
+        tolerance: Maximum distance between a curve and its flattened chords, in outline units
+
+    Returns: List of (n, 2) arrays, one per closed contour
+    """
+    contours = []
+
+    def move_to(a, _):
+        contours.append([np.array([(a.x, a.y)], dtype=float)])
+        return 0
+
+    def line_to(a, _):
+        contours[-1].append(np.array([(a.x, a.y)], dtype=float))
+        return 0
+
+    def curve_to(*args):
+        start = contours[-1][-1][-1]
+        control = np.array([start] + [(p.x, p.y) for p in args[:-1]], dtype=float)
+        contours[-1].append(flatten_bezier(control, tolerance))
+        return 0
+
+    outline.decompose(
+        None, move_to=move_to, line_to=line_to, conic_to=curve_to, cubic_to=curve_to
+    )
+    return [np.concatenate(contour) for contour in contours]
+
+
+def nest_contours(contours: list[np.ndarray]):
+    """
+    Assemble closed contours into polygons with holes. A contour inside an odd number of others is a hole in the
+    smallest one containing it, so this works whichever way round the font winds its outlines.
+    Args:
+        contours: List of (n, 2) arrays of contour points
+
+    Returns: A Polygon or MultiPolygon
+    """
+    rings = sorted((Polygon(c) for c in contours if len(c) >= 3), key=lambda r: r.area)
+    holes = {}
+    shells = []
+    for i, ring in enumerate(rings):
+        point = Point(ring.exterior.coords[0])
+        parents = [j for j in range(i + 1, len(rings)) if rings[j].contains(point)]
+        if len(parents) % 2 == 1:
+            holes.setdefault(parents[0], []).append(ring.exterior.coords)
+        else:
+            shells.append(i)
+    polygons = [Polygon(rings[i].exterior.coords, holes.get(i, [])) for i in shells]
+    if len(polygons) == 1:
+        return polygons[0]
+    return MultiPolygon(polygons)
+
+
+@lru_cache(maxsize=None)
+def _face(font_path: str) -> Face:
+    return Face(font_path)
+
+
+def em_size(face: Face) -> float:
+    """
+    The em size at the face's current character size, in the 26.6 units its outlines are given in.
+    """
+    # x_scale is a 16.16 fixed point factor from font units to 26.6 units
+    return face.units_per_EM * face.size.x_scale / 65536
+
 
+@lru_cache(maxsize=None)
+def load_glyph(
+    font_path: str, char: str, size: int, tolerance: float = GLYPH_TOLERANCE
+):
+    """
+    Decode a character's outline into polygons, cached per font, character and size.
+    Args:
+        font_path: Path of the font file
+        char: The character
+        size: Character size in 1/64ths of a point
+        tolerance: Maximum distance between a curve and its flattened chords, as a fraction of the em size
 
-def load_character(face: Face, char: str) -> Polygon:
+    Returns: The glyph as a Polygon or MultiPolygon, and its horizontal advance
+    """
+    face = _face(font_path)
+    face.set_char_size(size)
+    return load_character(face, char, tolerance), face.glyph.advance.x
+
+
+def load_character(face: Face, char: str, tolerance: float = GLYPH_TOLERANCE):
+    """
+    Decode a character's outline into polygons at the face's current character size.
+    Args:
+        face: The font face
+        char: The character
+        tolerance: Maximum distance between a curve and its flattened chords, as a fraction of the em size
+
+    Returns: The glyph as a Polygon or MultiPolygon
+    """
     face.load_char(char)
-    shape = Polygon(face.glyph.outline.points)
-    return shape
-
-
-def shade_shape(shape: Polygon, gap: float, resolution: float) -> Drawing:
-    print(shape.bounds)
-    min_x, min_y, max_x, max_y = shape.bounds
-    paths = []
-    for y in np.arange(min_y, max_y, gap):
-        line_start = None
-        line_end = None
-        for x in np.arange(min_x, max_x, resolution):
-            point = Point(x, y)
-            if shape.contains(point):
-                if line_start is None:
-                    line_start = (x, y)
-                line_end = (x, y)
-            else:
-                if line_start and line_start != line_end:
-                    paths.append([line_start, line_end])
-                line_start, line_end = None, None
-        if line_start and line_start != line_end:
-            paths.append([line_start, line_end])
-    return Drawing(paths).scale(1, -1)
+    contours = outline_contours(face.glyph.outline, tolerance * em_size(face))
+    return nest_contours(contours)
+
+
+def shape_edges(shape) -> np.ndarray:
+    """
+    Every edge of a polygon or multipolygon, holes included.
+    Args:
+        shape: A shapely Polygon or MultiPolygon
+
+    Returns: (n, 2, 2) array of edge endpoints
+    """
+    edges = []
+    for polygon in getattr(shape, "geoms", [shape]):
+        for ring in [polygon.exterior, *polygon.interiors]:
+            coords = np.asarray(ring.coords)
+            edges.append(np.stack((coords[:-1], coords[1:]), axis=1))
+    if not edges:
+        return np.empty((0, 2, 2))
+    return np.concatenate(edges)
+
+
+def rotation_matrix(angle: float) -> np.ndarray:
+    return np.array([[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]])
+
+
+def scanline_spans(edges: np.ndarray, ys: np.ndarray) -> np.ndarray:
+    """
+    Intersect horizontal lines with a set of closed rings and pair up the crossings by the even-odd rule.
+    Args:
+        edges: (n, 2, 2) array of the edges of the rings
+        ys: y coordinates of the lines
+
+    Returns: (m, 2, 2) array of the segments of the lines that are inside the rings
+    """
+    y0 = edges[None, :, 0, 1]
+    y1 = edges[None, :, 1, 1]
+    y = ys[:, None]
+    # Half open so a line through a vertex crosses exactly one of the edges that meet there
+    crosses = (y0 <= y) != (y1 <= y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = (y - y0) / (y1 - y0)
+    x = edges[None, :, 0, 0] + t * (edges[None, :, 1, 0] - edges[None, :, 0, 0])
+    x = np.sort(np.where(crosses, x, np.inf), axis=1)
+    x = x[:, : crosses.sum(axis=1).max(initial=0)]
+    starts, ends = x[:, 0::2], x[:, 1::2]
+    inside = np.isfinite(starts) & (ends > starts)
+    rows = np.broadcast_to(y, starts.shape)[inside]
+    return np.stack(
+        (
+            np.stack((starts[inside], rows), axis=-1),
+            np.stack((ends[inside], rows), axis=-1),
+        ),
+        axis=1,
+    )
+
+
+def shade_shape(shape: Polygon, gap: float, *, angle: float = 0) -> Drawing:
+    """
+    Fill a shape with parallel hatch lines, cut exactly at its outline.
+    Args:
+        shape: A shapely Polygon or MultiPolygon, which may have holes
+        gap: Distance between hatch lines
+        angle: Angle of the hatch lines in radians
+
+    Returns: Drawing of the hatch lines, flipped vertically
+    """
+    edges = shape_edges(shape) @ rotation_matrix(angle)
+    if len(edges) == 0:
+        return Drawing([])
+    min_y = edges[..., 1].min()
+    max_y = edges[..., 1].max()
+    spans = scanline_spans(edges, np.arange(min_y, max_y, gap))
+    spans = spans @ rotation_matrix(angle).T
+    return Drawing(spans.tolist()).scale(1, -1)
+
+
+def text_shape(
+    font_path: str, text: str, size: int, tolerance: float = GLYPH_TOLERANCE
+) -> MultiPolygon:
+    """
+    Lay out a line of text as one MultiPolygon, placing each cached glyph at the running advance. tolerance is
+    as for load_glyph.
+    """
+    polygons = []
+    x = 0
+    for char in text:
+        shape, advance = load_glyph(font_path, char, size, tolerance)
+        glyph = translate(shape, x, 0)
+        polygons.extend(getattr(glyph, "geoms", [glyph]))
+        x += advance
+    return MultiPolygon([p for p in polygons if not p.is_empty])
+
+
+def shade_text(
+    font_path: str,
+    text: str,
+    size: int,
+    gap: float,
+    *,
+    angle: float = 0,
+    tolerance: float = GLYPH_TOLERANCE,
+) -> Drawing:
+    return shade_shape(text_shape(font_path, text, size, tolerance), gap, angle=angle)
 
 
 def main():
-    face = Face('C:/Windows/Fonts/TAHOMA.ttf')
-    face.set_char_size(20)
-    letter = load_character(face, 'B')
-    print(letter.exterior)
-    drawing = shade_shape(letter, 0.3, 0.1)
+    drawing = shade_text("C:/Windows/Fonts/TAHOMA.ttf", "B", 20, 0.3)
     drawing = drawing.scale_to_fit(8, 8, 1).center(8, 8)
     im = drawing.render(bounds=(0, 0, 8, 8))
     im.write_to_png("circle.png")
@@ -46,4 +246,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,77 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from shapely.geometry import Polygon
+
+from axi_art.fill_shape.fill_shape import (
+    flatten_bezier,
+    load_character,
+    nest_contours,
+    scanline_spans,
+    shade_shape,
+    shape_edges,
+)
+
+
+def square(x, y, size):
+    return np.array([(x, y), (x + size, y), (x + size, y + size), (x, y + size)])
+
+
+def test_scanline_spans_skip_holes():
+    square = Polygon(
+        [(0, 0), (10, 0), (10, 10), (0, 10)], [[(2, 2), (4, 2), (4, 4), (2, 4)]]
+    )
+    spans = scanline_spans(shape_edges(square), np.array([1.0, 3.0, 10.0]))
+    assert np.allclose(spans, [[(0, 1), (10, 1)], [(0, 3), (2, 3)], [(4, 3), (10, 3)]])
+
+
+def test_flatten_bezier_within_tolerance():
+    control = np.array([(0, 0), (5, 10), (10, 0)])
+    points = flatten_bezier(control, 0.01)
+    assert np.allclose(points[-1], (10, 0))
+    assert np.abs(points[:, 1].max() - 5) < 0.01
+    assert len(points) < len(flatten_bezier(control, 0.001))
+
+
+def test_nest_contours_makes_holes_and_islands():
+    shape = nest_contours(
+        [square(0, 0, 10), square(1, 1, 3), square(1.5, 1.5, 1), square(20, 0, 2)]
+    )
+    assert [len(polygon.interiors) for polygon in shape.geoms] == [0, 0, 1]
+    assert np.isclose(shape.area, 100 - 9 + 1 + 4)
+
+
+def test_shade_shape_angle_is_keyword_only():
+    shape = Polygon(square(0, 0, 1))
+    assert len(shade_shape(shape, 0.25, angle=np.pi / 4).paths) > 0
+    # The third positional argument used to be a resolution
+    with pytest.raises(TypeError):
+        shade_shape(shape, 0.25, 0.1)
+
+
+def fake_face(em: float) -> SimpleNamespace:
+    # A face whose only glyph is a triangle with one curved side, scaled to the em size
+    def point(x, y):
+        return SimpleNamespace(x=x * em, y=y * em)
+
+    def decompose(_, move_to, line_to, conic_to, cubic_to):
+        move_to(point(0, 0), None)
+        line_to(point(1, 0), None)
+        conic_to(point(1, 1), point(0, 1), None)
+        line_to(point(0, 0), None)
+
+    glyph = SimpleNamespace(outline=SimpleNamespace(decompose=decompose))
+    return SimpleNamespace(
+        units_per_EM=1000,
+        size=SimpleNamespace(x_scale=em * 65536 / 1000),
+        glyph=glyph,
+        load_char=lambda char: None,
+    )
+
+
+def test_glyph_tolerance_scales_with_size():
+    small = load_character(fake_face(20), "a")
+    large = load_character(fake_face(2000), "a")
+    assert len(small.exterior.coords) == len(large.exterior.coords)
+    assert len(small.exterior.coords) > 5
@@ -5,6 +5,8 @@ from PIL import ImageEnhance, Image
 from axi import Drawing
 from tqdm import tqdm
 
+from axi_art.path_order import order_drawing
+
 jarvis = np.array([[0, 0, 0, 7, 5], [3, 5, 7, 5, 3], [1, 3, 5, 3, 1]]) / 48
 
 
@@ -164,7 +166,7 @@ def main(
     img = Image.open("swish.jpg").convert("L")
     drawing = hatch(img, brightness, contrast, line_gap, line_res)
     drawing = drawing.scale_to_fit(width, height, margin).center(width, height)
-    drawing = drawing.sort_paths()
+    drawing = order_drawing(drawing, verbose=True)
     if test or axi.device.find_port() is None:
         im = drawing.render(bounds=(0, 0, width, height))
         im.write_to_png("hatch.png")
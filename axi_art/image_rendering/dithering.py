@@ -1,11 +1,13 @@
 import axi
 import axi.device
+import click
 import math
 from PIL import Image
-import requests
 import numpy as np
 from matplotlib import pyplot as plt
 
+from axi_art.image_rendering.image_input import load_image, resize
+
 FLOYD_STEINBERG = (np.array([[0, 0, 7], [3, 5, 1]]),)
 JARVIS = (np.array([[0, 0, 0, 7, 5], [3, 5, 7, 5, 3], [1, 3, 5, 3, 1]]),)
 STUCKI = (np.array([[0, 0, 0, 8, 4], [2, 4, 8, 4, 2], [1, 2, 4, 2, 1]]),)
@@ -44,24 +46,16 @@ def dither(pixels, diffusion, divisor=None):
     return out
 
 
-def resize(img, width=0, height=0):
-    if width == height == 0:
-        raise ValueError("At least one of width or height must be provided")
-    if width == 0:
-        width = round(img.width * (height / img.height))
-    elif height == 0:
-        height = round(img.height * (width / img.width))
-    return img.resize(size=(width, height), resample=Image.NEAREST)
-
-
-def main():
+@click.command()
+@click.option(
+    "-i",
+    "--image",
+    default="https://pbs.twimg.com/profile_images/1309133913953099776/PEgTVuQB_400x400.jpg",
+    help="Path or URL of the image",
+)
+def main(image: str):
     axi.device.MAX_VELOCITY = 2
-    url = (
-        "https://pbs.twimg.com/profile_images/1309133913953099776/PEgTVuQB_400x400.jpg"
-    )
-    img = Image.open(requests.get(url, stream=True).raw).convert("L")
-    img = resize(img, width=100)
-    pixels = np.asarray(img, dtype="float64")
+    pixels = np.asarray(load_image(image, "L", width=100), dtype="float64")
     dithered = dither(pixels, *ATKINSON)
     out_img = Image.fromarray(np.uint8(dithered))
     out_img = resize(out_img, width=600)
@@ -0,0 +1,85 @@
+"""
+Image input for the image renderers. Images can come from a local path or a URL, and the decoded, converted and
+resized pixels are cached on disk as .npy files so re-running a script with new drawing parameters doesn't
+download or decode the image again, and works offline once an image has been seen.
+"""
+import hashlib
+import io
+import os
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import requests
+from PIL import Image
+
+CACHE_DIR = Path(
+    os.environ.get("AXI_ART_CACHE", Path.home() / ".cache" / "axi_art" / "images")
+)
+
+
+def resize(img, width=0, height=0):
+    if width == height == 0:
+        raise ValueError("At least one of width or height must be provided")
+    if width == 0:
+        width = round(img.width * (height / img.height))
+    elif height == 0:
+        height = round(img.height * (width / img.width))
+    return img.resize(size=(width, height), resample=Image.NEAREST)
+
+
+def _is_url(source: str) -> bool:
+    return source.startswith(("http://", "https://"))
+
+
+def _source_hash(source: str) -> str:
+    # URLs are keyed by the address so a cached image never needs the network, files by their contents
+    if _is_url(source):
+        return hashlib.sha1(source.encode()).hexdigest()
+    return hashlib.sha1(Path(source).read_bytes()).hexdigest()
+
+
+def _decode(source: str, mode: str, width: int, height: int) -> np.ndarray:
+    if _is_url(source):
+        response = requests.get(source)
+        response.raise_for_status()
+        img = Image.open(io.BytesIO(response.content))
+    else:
+        img = Image.open(source)
+    img = img.convert(mode)
+    if width or height:
+        img = resize(img, width, height)
+    return np.asarray(img)
+
+
+def load_image(
+    source: str,
+    mode: str = "L",
+    width: int = 0,
+    height: int = 0,
+    cache_dir: Optional[Path] = CACHE_DIR,
+) -> np.ndarray:
+    """
+    Load an image as a pixel array, going through the on-disk cache.
+    Args:
+        source: Local path or http(s) URL of the image
+        mode: PIL mode to convert the image to, e.g. "L" or "CMYK"
+        width: Width to resize to, or 0 to keep the aspect ratio given the height
+        height: Height to resize to, or 0 to keep the aspect ratio given the width. The image isn't resized if
+            both are 0.
+        cache_dir: Where to keep decoded images, or None to skip the cache
+
+    Returns: Read-only, memory-mapped array of shape (height, width) or (height, width, channels)
+    """
+    if cache_dir is None:
+        return _decode(source, mode, width, height)
+    key = f"{_source_hash(source)}-{mode}-{width}x{height}"
+    path = Path(cache_dir) / f"{key}.npy"
+    if not path.exists():
+        pixels = _decode(source, mode, width, height)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(partial, "wb") as f:
+            np.save(f, pixels)
+        os.replace(partial, path)
+    return np.load(path, mmap_mode="r")
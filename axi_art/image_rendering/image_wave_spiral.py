@@ -1,78 +1,101 @@
 import axi
 import axi.device
+import click
 
 import numpy as np
-import math
-from PIL import Image
-import requests
 
+from axi_art.image_rendering.image_input import load_image
+from axi_art.resample import simplify_drawing
+from axi_art.sampling import SAMPLERS
 from axi_art.utils import map_range
 
 
-def grid_interpolate(pixels, x, y, channel=None):
-    x_off = x - math.floor(x)
-    y_off = y - math.floor(y)
-    if channel is None:
-        ul = (1 - x_off) * (1 - y_off) * pixels[math.floor(y), math.floor(x)]
-        dl = (1 - x_off) * y_off * pixels[math.ceil(y), math.floor(x)]
-        ur = x_off * (1 - y_off) * pixels[math.floor(y), math.ceil(x)]
-        dr = x_off * y_off * pixels[math.ceil(y), math.ceil(x)]
-    else:
-        ul = (1 - x_off) * (1 - y_off) * pixels[math.floor(y), math.floor(x), channel]
-        dl = (1 - x_off) * y_off * pixels[math.ceil(y), math.floor(x), channel]
-        ur = x_off * (1 - y_off) * pixels[math.floor(y), math.ceil(x), channel]
-        dr = x_off * y_off * pixels[math.ceil(y), math.ceil(x), channel]
-    return sum([ul, dr, ur, dl])
+def spiral_paths(
+    pixels, n_points, segment_length, amp, channels, interpolation="bilinear"
+):
+    """
+    Trace the spiral once and displace a copy of it by each channel of the image. All channels are sampled in a
+    single pass, and each copy's wave is phase shifted by a third of a turn per channel index so the copies
+    interleave when plotted on top of each other.
+    Args:
+        pixels: (height, width, channels) image
+        n_points: Points along the spiral
+        segment_length: Spacing of the points along the spiral
+        amp: Displacement of a fully dark pixel, as a fraction of the gap between turns
+        channels: Indices of the channels to trace
+        interpolation: One of the sampling.SAMPLERS names
 
+    Returns: One path per channel, in the order given
+    """
 
-def im_spiral(pixels, n_points, segment_length, amp, channel):
     # TODO: Make the arguments more intuitive
     def spiral_sample(n, k):
-        return np.sqrt(2) * np.sqrt(-1 + np.sqrt(1 + (k ** 2) * (n ** 2)))
+        return np.sqrt(2) * np.sqrt(-1 + np.sqrt(1 + (k**2) * (n**2)))
 
     radius = min(pixels.shape[:2]) // 2
     theta_max = spiral_sample(n_points, segment_length)
     spiral_gap = map_range(2 * np.pi, 0, theta_max, 0, radius)
-    path = []
-    for i in range(n_points):
-        theta = spiral_sample(i, segment_length) + np.pi
-        r = map_range(theta, 0, theta_max, 0, radius)
-        x, y = (
-            r * np.cos(theta) + pixels.shape[1] // 2,
-            r * np.sin(theta) + pixels.shape[0] // 2,
-        )
-        x, y = int(x), int(y)
-        # r += map_range(grid_interpolate(pixels, x, y, channel), 0, 255, amp, 0) * spiral_gap * np.cos(i)
-        try:
-            color = pixels[y, x, channel]
-        except IndexError:
-            pass
-        r_offset = (
-            map_range(color, 0, 255, amp, 0)
-            * spiral_gap
-            * np.cos(i + channel * 2 * np.pi / 3)
+    i = np.arange(n_points)
+    theta = spiral_sample(i, segment_length) + np.pi
+    r = map_range(theta, 0, theta_max, 0, radius)
+    x = r * np.cos(theta) + pixels.shape[1] // 2
+    y = r * np.sin(theta) + pixels.shape[0] // 2
+    channels = np.asarray(channels)
+    colors = SAMPLERS[interpolation](pixels[..., channels], x, y).T
+    phases = i[None, :] + channels[:, None] * 2 * np.pi / 3
+    r = r + map_range(colors, 0, 255, amp, 0) * spiral_gap * np.cos(phases)
+    xs = (r * np.cos(theta)).tolist()
+    ys = (r * np.sin(theta)).tolist()
+    return [list(zip(x, y)) for x, y in zip(xs, ys)]
+
+
+def im_spiral(pixels, n_points, segment_length, amp, channel, interpolation="bilinear"):
+    return spiral_paths(
+        pixels, n_points, segment_length, amp, [channel], interpolation
+    )[0]
+
+
+def im_spiral_layers(
+    pixels, n_points, segment_length, amp, channels=(2, 1, 0), interpolation="bilinear"
+):
+    """
+    One spiral Drawing per pen layer, in plotting order. The CMYK default plots Yellow (2), Magenta (1), then
+    Cyan (0).
+    """
+    return [
+        axi.Drawing([path])
+        for path in spiral_paths(
+            pixels, n_points, segment_length, amp, channels, interpolation
         )
-        r += r_offset
-        x, y = r * np.cos(theta), r * np.sin(theta)
-        path.append((x, y))
-    return path
+    ]
 
 
-def main():
+@click.command()
+@click.option(
+    "-i",
+    "--image",
+    default="https://mykindofmeeple.com/wp-content/uploads/2019/01/many-meeples-1602-27042020.jpg",
+    help="Path or URL of the image",
+)
+@click.option(
+    "-s",
+    "--simplify",
+    default=0,
+    type=float,
+    help="Simplify the spiral, straying at most this far from it, e.g. 0.001. 0 keeps every point",
+)
+def main(image: str, simplify: float):
     axi.device.MAX_VELOCITY = 1.5
-    url = "https://mykindofmeeple.com/wp-content/uploads/2019/01/many-meeples-1602-27042020.jpg"
-    img = Image.open(requests.get(url, stream=True).raw).convert("CMYK")
-    pixels = np.asarray(img)
-    paths = [
-        im_spiral(pixels, 50000, 1, 0.5, 0)
-    ]  # Plot in this order: Yellow (2), Magenta (1), Cyan (0)
-    drawing = axi.Drawing(paths).scale_to_fit(11, 8.5, 1)
-    drawing = drawing.scale_to_fit(8.5, 5.5, 0.5).center(8.5, 5.5)
+    pixels = load_image(image, "CMYK")
+    layers = im_spiral_layers(pixels, 50000, 1, 0.5)
+    layers = axi.Drawing.multi_scale_to_fit(layers, 8.5, 5.5, 0.5)
+    if simplify > 0:
+        layers = [simplify_drawing(layer, simplify, verbose=True) for layer in layers]
     if axi.device.find_port() is None:
-        im = drawing.render()
+        im = axi.Drawing.render_layers(layers, bounds=(0, 0, 8.5, 5.5))
         im.write_to_png("image_lines.png")
     else:
-        axi.draw(drawing)
+        axi.draw_layers(layers)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,17 @@
+import numpy as np
+from PIL import Image
+
+from axi_art.image_rendering.image_input import load_image
+
+
+def test_load_image_caches_converted_pixels(tmp_path):
+    source = tmp_path / "image.png"
+    Image.fromarray(np.arange(48, dtype=np.uint8).reshape(4, 4, 3)).save(source)
+    cache_dir = tmp_path / "cache"
+    pixels = load_image(str(source), "L", width=2, cache_dir=cache_dir)
+    assert pixels.shape == (2, 2)
+    assert len(list(cache_dir.glob("*.npy"))) == 1
+    # A changed file is a new cache entry
+    Image.fromarray(np.zeros((4, 4, 3), dtype=np.uint8)).save(source)
+    assert np.all(load_image(str(source), "L", width=2, cache_dir=cache_dir) == 0)
+    assert len(list(cache_dir.glob("*.npy"))) == 2
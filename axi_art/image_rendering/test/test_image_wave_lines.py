@@ -0,0 +1,11 @@
+import numpy as np
+
+from axi_art.image_rendering.image_wave_lines import im_lines
+
+
+def test_lines_are_drawn_over_the_columns_they_sample():
+    pixels = np.full((4, 8), 255, dtype=np.uint8)
+    pixels[:, 6] = 0
+    line = np.array(im_lines(1, pixels, 8, 1)[0])
+    displaced = np.flatnonzero(line[:, 1] != 0)
+    assert line[displaced, 0].tolist() == [6.0]
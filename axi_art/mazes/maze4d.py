@@ -1,11 +1,15 @@
 from __future__ import annotations
 
+import heapq
 import math
 import random
 
 import axi
 import click
+import numpy as np
 
+from axi_art.path_order import order_drawing
+from axi_art.strokes import assemble_drawing
 from axi_art.utils import offset_paths
 
 coord = tuple[int, int, int, int]
@@ -136,29 +140,48 @@ def circle(x, y, r):
     return path
 
 
+def wall_runs(walls: np.ndarray, door_margin: float) -> list[tuple[float, float]]:
+    """
+    Collapse a row of unit-length wall edges into maximal collinear runs.
+    Args:
+        walls: Boolean array where walls[i] is True if edge i (spanning i to i + 1) is a solid wall
+        door_margin: Length of the wall stub left on either side of a door
+
+    Returns: (start, end) positions along the row of every continuous run of wall
+    """
+    doors = np.flatnonzero(~walls)
+    starts = np.concatenate(([0], doors + 1 - door_margin))
+    ends = np.concatenate((doors + door_margin, [len(walls)]))
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
 def make_2d_slice_paths(cells, z, w, bounds, endpoints=None):
     if endpoints is None:
         endpoints = []
     paths = []
     door_margin = 1 / 8
     # Render the Maze
+    west_walls = np.array(
+        [
+            [cells[(x, y, z, w)].walls[(-1, 0, 0, 0)] for y in range(bounds[1])]
+            for x in range(bounds[0])
+        ]
+    )
+    north_walls = np.array(
+        [
+            [cells[(x, y, z, w)].walls[(0, -1, 0, 0)] for x in range(bounds[0])]
+            for y in range(bounds[1])
+        ]
+    )
+    for x in range(bounds[0]):
+        for start, end in wall_runs(west_walls[x], door_margin):
+            paths.append([(x, start), (x, end)])  # WEST WALLS W/ DOORS
+    for y in range(bounds[1]):
+        for start, end in wall_runs(north_walls[y], door_margin):
+            paths.append([(start, y), (end, y)])  # NORTH WALLS W/ DOORS
     for x in range(bounds[0]):
         for y in range(bounds[1]):
             cell = cells[(x, y, z, w)]
-            if cell.walls[(-1, 0, 0, 0)]:
-                paths.append([(x, y), (x, y + 1)])  # WEST WALL
-            else:
-                paths += [
-                    [(x, y), (x, y + door_margin)],
-                    [(x, y + 1 - door_margin), (x, y + 1)],
-                ]  # WEST WALL W/ DOOR
-            if cell.walls[(0, -1, 0, 0)]:
-                paths.append([(x, y), (x + 1, y)])  # NORTH WALL
-            else:
-                paths += [
-                    [(x, y), (x + door_margin, y)],
-                    [(x + 1 - door_margin, y), (x + 1, y)],
-                ]  # WEST WALL W/ DOOR
             if not cell.walls[(0, 0, -1, 0)]:
                 paths.append(
                     [(x + 0.4, y + 0.3), (x + 0.5, y + 0.1), (x + 0.6, y + 0.3)]
@@ -197,25 +220,58 @@ def backtrack(prev, cell):
 def astar(cells, start, end):
     prev = {start: None}
     g_score = {start: 0}
-    f_score = {start: manhattan(start, end)}
-    open_set = {start}
-    while len(open_set) > 0:
-        curr = min(open_set, key=lambda x: f_score[x])
+    open_heap = [(manhattan(start, end), 0, start)]
+    closed = set()
+    while len(open_heap) > 0:
+        _, g, curr = heapq.heappop(open_heap)
+        if curr in closed:
+            continue
         if curr == end:
             return backtrack(prev, curr)
-        open_set.remove(curr)
+        closed.add(curr)
         cell = cells[curr]
         for neighbor in [
             cell.neighbors[d].coords
             for d in cell.get_neighbor_directions()
             if not cell.walls[d]
         ]:
-            tentative_g_score = g_score[curr] + 1
+            tentative_g_score = g + 1
             if neighbor not in g_score or tentative_g_score < g_score[neighbor]:
                 prev[neighbor] = curr
                 g_score[neighbor] = tentative_g_score
-                f_score[neighbor] = tentative_g_score + manhattan(neighbor, end)
-                open_set.add(neighbor)
+                f_score = tentative_g_score + manhattan(neighbor, end)
+                heapq.heappush(open_heap, (f_score, tentative_g_score, neighbor))
+
+
+def slice_offset(z, w, bounds):
+    return w * (bounds[0] + 1), z * (bounds[1] + 1)
+
+
+def make_solution_paths(solution: list[coord], bounds, portal_radius=0.3):
+    """
+    Render a path through the maze as continuous polylines laid out the same way as the 2d slices.
+    Args:
+        solution: Cell coordinates visited by the path, in order
+        bounds: The dimensions of the maze
+        portal_radius: Size of the marker drawn wherever the path moves between slices
+
+    Returns: A list of paths, one polyline per visit to a slice plus the portal markers
+    """
+    paths = []
+    line = []
+    for i, (x, y, z, w) in enumerate(solution):
+        off_x, off_y = slice_offset(z, w, bounds)
+        center = (x + 0.5 + off_x, y + 0.5 + off_y)
+        if i > 0 and solution[i - 1][2:] != (z, w):
+            # Crossing a portal: finish the line in the old slice and mark both ends
+            paths.append(line)
+            prev_x, prev_y = line[-1]
+            paths.append(circle(prev_x, prev_y, portal_radius))
+            paths.append(circle(*center, portal_radius))
+            line = []
+        line.append(center)
+    paths.append(line)
+    return [path for path in paths if len(path) > 1]
 
 
 @click.command()
@@ -232,6 +288,7 @@ def astar(cells, start, end):
 @click.option("-mrb", "--meta-row-bias", prompt=True, type=float, default=1)
 @click.option("-mcb", "--meta-col-bias", prompt=True, type=float, default=1)
 @click.option("-r", "--random_pickup_prob", prompt=True, type=float, default=0)
+@click.option("-s", "--solution", is_flag=True)
 def main(
     test: bool,
     width: float,
@@ -246,6 +303,7 @@ def main(
     meta_row_bias: float,
     meta_col_bias: float,
     random_pickup_prob: float,
+    solution: bool,
 ):
     bounds = (rows, cols, meta_rows, meta_cols)
     cells = make_maze(
@@ -261,22 +319,22 @@ def main(
             submaze = make_2d_slice_paths(
                 cells, floor, dimension, bounds, endpoints=[end_a, end_b]
             )
-            submaze = offset_paths(
-                submaze, dimension * (bounds[0] + 1), floor * (bounds[1] + 1)
-            )
+            submaze = offset_paths(submaze, *slice_offset(floor, dimension, bounds))
             paths += submaze
-    drawing = (
-        axi.Drawing(paths)
-        .scale_to_fit(width, height, margin)
-        .join_paths(0.03)
-        .sort_paths()
-        .center(width, height)
-    )
+    layers = [axi.Drawing(paths)]
+    if solution:
+        layers.append(
+            axi.Drawing(make_solution_paths(astar(cells, end_a, end_b), bounds))
+        )
+    layers = axi.Drawing.multi_scale_to_fit(layers, width, height, margin)
+    layers = [
+        order_drawing(assemble_drawing(layer, 0.03), verbose=True) for layer in layers
+    ]
     if test or axi.device.find_port() is None:
-        im = drawing.render(bounds=(0, 0, width, height))
+        im = axi.Drawing.render_layers(layers, bounds=(0, 0, width, height))
         im.write_to_png("maze_4d.png")
     else:
-        axi.draw(drawing)
+        axi.draw_layers(layers)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,46 @@
+import random
+
+import numpy as np
+
+from axi_art.mazes.maze4d import (
+    astar,
+    bfs,
+    diff,
+    make_maze,
+    make_solution_paths,
+    wall_runs,
+)
+
+
+def test_wall_runs_solid():
+    assert wall_runs(np.array([True, True, True]), 0.125) == [(0, 3)]
+
+
+def test_wall_runs_doors():
+    walls = np.array([True, False, False, True])
+    assert wall_runs(walls, 0.125) == [
+        (0, 1.125),
+        (1.875, 2.125),
+        (2.875, 4),
+    ]
+
+
+def test_astar_solves_maze():
+    random.seed(0)
+    cells = make_maze(5, 4, 2, 2)
+    end_a = bfs(cells, (0, 0, 0, 0))[-1]
+    end_b = bfs(cells, end_a)[-1]
+    solution = astar(cells, end_a, end_b)
+    assert solution[0] == end_a and solution[-1] == end_b
+    for a, b in zip(solution, solution[1:]):
+        assert not cells[a].walls[diff(a, b)]
+
+
+def test_solution_paths_split_at_portals():
+    bounds = (3, 3, 2, 1)
+    solution = [(0, 0, 0, 0), (1, 0, 0, 0), (1, 0, 1, 0), (1, 1, 1, 0)]
+    paths = make_solution_paths(solution, bounds)
+    assert paths[0] == [(0.5, 0.5), (1.5, 0.5)]
+    assert paths[-1] == [(1.5, 4.5), (1.5, 5.5)]
+    # One portal marker in each of the two slices
+    assert len(paths) == 4
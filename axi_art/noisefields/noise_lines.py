@@ -1,48 +1,20 @@
-from opensimplex import OpenSimplex
 import axi
 import random
 import axi.device
-import math
+import numpy as np
 
-from axi_art.utils import map_range, Font, vertical_stack
+from axi_art.noisefields.simplex import fractal_noise2, permutation
+from axi_art.resample import simplify_drawing
+from axi_art.ridge_lines import cosine_envelope, ridge_lines
+from axi_art.utils import Font, vertical_stack
 
 seed = random.getrandbits(64)
-noise = OpenSimplex(seed=seed)
+perm = permutation(seed)
 random.seed(seed)
 
 
 def noise_octaves(x, y, octaves, persistence):
-    total = 0
-    frequency = 1
-    amplitude = 1
-    max_value = 0
-    for i in range(octaves):
-        total += noise.noise2d(x * frequency, y * frequency) * amplitude
-        max_value += amplitude
-        amplitude *= persistence
-        frequency *= 2
-    return 2 * total / max_value
-
-
-def noise_line(
-    y, width, amp, samples, x_noise_scale, y_noise_scale, octaves, persistence
-):
-    path = []
-    for i in range(samples):
-        theta = map_range(i, 0, samples, -math.pi, math.pi)
-        x_amp = map_range(math.cos(theta), -1, 1, 0, amp)
-        x = map_range(i, 0, samples, 0, width)
-        path.append(
-            (
-                x,
-                y
-                + x_amp
-                * noise_octaves(
-                    x * x_noise_scale, y * y_noise_scale, octaves, persistence
-                ),
-            )
-        )
-    return path
+    return fractal_noise2(x, y, perm, octaves, persistence)
 
 
 def noise_field(
@@ -55,49 +27,23 @@ def noise_field(
     y_noise_scale,
     octaves,
     persistence,
+    occluded=False,
 ):
-    paths = []
-    for i in range(lines):
-        y = map_range(i, 0, lines, 0, height)
-        paths.append(
-            noise_line(
-                y,
-                width,
-                amp,
-                samples,
-                x_noise_scale,
-                y_noise_scale,
-                octaves,
-                persistence,
-            )
-        )
-    return paths
-
-
-def occlude(paths, lookahead=None):
-    if lookahead is None:
-        lookahead = len(paths)
-    out = []
-    for i in range(len(paths) - 1):
-        path = []
-        for j in range(len(paths[i])):
-            path_point = paths[i][j]
-            point_ok = True
-            for other in range(i + 1, min(lookahead + i + 1, len(paths))):
-                below = paths[other][j]
-                if path_point[1] > below[1]:
-                    point_ok = False
-                    break
-            if point_ok:
-                path.append(path_point)
-            else:
-                if len(path) > 1:
-                    out.append(path)
-                path = []
-        if len(path) > 1:
-            out.append(path)
-    out.append(paths[-1])
-    return out
+    x = np.arange(samples) * width / samples
+    y = np.arange(lines) * height / lines
+    heights = noise_octaves(
+        x[None, :] * x_noise_scale, y[:, None] * y_noise_scale, octaves, persistence
+    )
+    return ridge_lines(
+        heights,
+        lines,
+        samples,
+        width,
+        height,
+        amp,
+        envelope=lambda xs: cosine_envelope(xs, width),
+        occluded=occluded,
+    )
 
 
 TEST = False
@@ -121,10 +67,10 @@ def main():
         y_noise_scale=y_noise_scale,
         octaves=octaves,
         persistence=persistence,
+        occluded=True,
     )
-    paths = occlude(paths)
     drawing = axi.Drawing(paths).scale_to_fit(12, 9, 0).sort_paths()
-    drawing = drawing.join_paths(0.03).simplify_paths(0.001)
+    drawing = simplify_drawing(drawing.join_paths(0.03), 0.001)
     f = Font(axi.FUTURAL, 10)
     text_drawing = f.text(str(seed)).scale_to_fit(11, 0.1)
     drawing = vertical_stack([drawing, text_drawing], 0.2, False)
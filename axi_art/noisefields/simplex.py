@@ -0,0 +1,155 @@
+"""
+Array implementation of the 2D OpenSimplex noise used by the opensimplex package, so that whole fields of
+noise can be evaluated at once. Output matches opensimplex's noise2d for the same seed.
+"""
+import numpy as np
+
+STRETCH_CONSTANT = -0.211324865405187  # (1/Math.sqrt(2+1)-1)/2
+SQUISH_CONSTANT = 0.366025403784439  # (Math.sqrt(2+1)-1)/2
+NORM_CONSTANT = 47
+GRADIENTS = np.array([5, 2, 2, 5, -5, 2, -2, 5, 5, -2, 2, -5, -5, -2, -2, -5])
+
+
+def _wrap_int64(x: int) -> int:
+    return (x + 2**63) % 2**64 - 2**63
+
+
+def permutation(seed: int) -> np.ndarray:
+    """
+    Build the permutation table that opensimplex derives from a seed.
+    Args:
+        seed: A 64-bit integer seed
+
+    Returns: The 256 entry permutation table
+    """
+    perm = np.zeros(256, dtype=np.int64)
+    source = list(range(256))
+    for _ in range(3):
+        seed = _wrap_int64(seed * 6364136223846793005 + 1442695040888963407)
+    for i in range(255, -1, -1):
+        seed = _wrap_int64(seed * 6364136223846793005 + 1442695040888963407)
+        r = (seed + 31) % (i + 1)
+        perm[i] = source[r]
+        source[r] = source[i]
+    return perm
+
+
+def _contribution(
+    perm: np.ndarray, xsv: np.ndarray, ysv: np.ndarray, dx: np.ndarray, dy: np.ndarray
+) -> np.ndarray:
+    attn = 2 - dx * dx - dy * dy
+    index = perm[(perm[xsv & 0xFF] + ysv) & 0xFF] & 0x0E
+    extrapolation = GRADIENTS[index] * dx + GRADIENTS[index + 1] * dy
+    squared = attn * attn
+    return np.where(attn > 0, squared * squared * extrapolation, 0)
+
+
+def noise2(x: np.ndarray, y: np.ndarray, perm: np.ndarray) -> np.ndarray:
+    """
+    Evaluate 2D OpenSimplex noise at every pair of coordinates.
+    Args:
+        x: Array of x coordinates
+        y: Array of y coordinates, broadcast against x
+        perm: Permutation table from permutation()
+
+    Returns: Noise values between -1 and 1, in the broadcast shape of x and y
+    """
+    x, y = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+    # Place input coordinates onto grid.
+    stretch_offset = (x + y) * STRETCH_CONSTANT
+    xs = x + stretch_offset
+    ys = y + stretch_offset
+    # Floor to get grid coordinates of rhombus (stretched square) super-cell origin.
+    xsb = np.floor(xs).astype(np.int64)
+    ysb = np.floor(ys).astype(np.int64)
+    # Skew out to get actual coordinates of rhombus origin.
+    squish_offset = (xsb + ysb) * SQUISH_CONSTANT
+    xb = xsb + squish_offset
+    yb = ysb + squish_offset
+    # Compute grid coordinates relative to rhombus origin.
+    xins = xs - xsb
+    yins = ys - ysb
+    in_sum = xins + yins
+    # Positions relative to origin point.
+    dx0 = x - xb
+    dy0 = y - yb
+
+    value = _contribution(
+        perm, xsb + 1, ysb + 0, dx0 - 1 - SQUISH_CONSTANT, dy0 - 0 - SQUISH_CONSTANT
+    )
+    value = value + _contribution(
+        perm, xsb + 0, ysb + 1, dx0 - 0 - SQUISH_CONSTANT, dy0 - 1 - SQUISH_CONSTANT
+    )
+
+    lower = in_sum <= 1
+    x_greater = xins > yins
+    # Inside the triangle at (0,0): is (0,0) one of the two closest vertices?
+    lower_near = ((1 - in_sum) > xins) | ((1 - in_sum) > yins)
+    # Inside the triangle at (1,1): is (1,1) one of the two closest vertices?
+    upper_near = ((2 - in_sum) < xins) | ((2 - in_sum) < yins)
+    double_squish = 2 * SQUISH_CONSTANT
+    # Pick the extra vertex for each of the regions the point can be in
+    regions = [
+        lower & lower_near & x_greater,
+        lower & lower_near,
+        lower,
+        upper_near & x_greater,
+        upper_near,
+    ]
+    xsv_ext = np.select(regions, [xsb + 1, xsb - 1, xsb + 1, xsb + 2, xsb + 0], xsb)
+    ysv_ext = np.select(regions, [ysb - 1, ysb + 1, ysb + 1, ysb + 0, ysb + 2], ysb)
+    dx_ext = np.select(
+        regions,
+        [
+            dx0 - 1,
+            dx0 + 1,
+            dx0 - 1 - double_squish,
+            dx0 - 2 - double_squish,
+            dx0 + 0 - double_squish,
+        ],
+        dx0,
+    )
+    dy_ext = np.select(
+        regions,
+        [
+            dy0 + 1,
+            dy0 - 1,
+            dy0 - 1 - double_squish,
+            dy0 + 0 - double_squish,
+            dy0 - 2 - double_squish,
+        ],
+        dy0,
+    )
+    # Contribution (0,0) or (1,1)
+    value = value + np.where(
+        lower,
+        _contribution(perm, xsb, ysb, dx0, dy0),
+        _contribution(
+            perm, xsb + 1, ysb + 1, dx0 - 1 - double_squish, dy0 - 1 - double_squish
+        ),
+    )
+    # Extra vertex
+    value = value + _contribution(perm, xsv_ext, ysv_ext, dx_ext, dy_ext)
+    return value / NORM_CONSTANT
+
+
+def fractal_noise2(
+    x: np.ndarray, y: np.ndarray, perm: np.ndarray, octaves: int, persistence: float
+) -> np.ndarray:
+    """
+    Sum octaves of noise, each at double the frequency of the last, evaluating all of them in one pass.
+    Args:
+        x: Array of x coordinates
+        y: Array of y coordinates, broadcast against x
+        perm: Permutation table from permutation()
+        octaves: How many octaves to sum
+        persistence: How much each octave's amplitude is scaled relative to the last
+
+    Returns: Noise values between -2 and 2, in the broadcast shape of x and y
+    """
+    x, y = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+    extra_dims = (slice(None),) + (None,) * x.ndim
+    frequencies = (2.0 ** np.arange(octaves))[extra_dims]
+    amplitudes = (persistence ** np.arange(octaves))[extra_dims]
+    total = np.sum(noise2(x * frequencies, y * frequencies, perm) * amplitudes, axis=0)
+    return 2 * total / np.sum(amplitudes)
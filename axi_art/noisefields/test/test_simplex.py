@@ -0,0 +1,23 @@
+import numpy as np
+from opensimplex import OpenSimplex
+
+from axi_art.noisefields.simplex import fractal_noise2, noise2, permutation
+
+
+def test_noise2_matches_opensimplex():
+    rng = np.random.default_rng(0)
+    x, y = rng.uniform(-20, 20, (2, 500))
+    for seed in (0, 7, 2**63 + 5):
+        reference = OpenSimplex(seed=seed)
+        # opensimplex renamed noise2d to noise2 in 0.4
+        sample = getattr(reference, "noise2d", None) or reference.noise2
+        expected = [sample(a, b) for a, b in zip(x, y)]
+        assert np.allclose(noise2(x, y, permutation(seed)), expected)
+
+
+def test_fractal_noise2_single_octave():
+    perm = permutation(3)
+    x, y = np.meshgrid(np.linspace(0, 4, 30), np.linspace(0, 3, 20))
+    noise = fractal_noise2(x, y, perm, 1, 0.5)
+    assert noise.shape == (20, 30)
+    assert np.allclose(noise, 2 * noise2(x, y, perm))
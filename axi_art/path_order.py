@@ -0,0 +1,226 @@
+"""
+Ordering paths to cut pen-up travel. A greedy nearest-neighbour tour over both ends of every path (so paths can
+be drawn backwards) is built with a KD-tree, then improved with 2-opt and Or-opt moves restricted to nearby
+endpoints until a time budget runs out.
+"""
+import math
+import time
+
+import axi
+import numpy as np
+from scipy.spatial import KDTree
+
+from axi_art.pathset import PathSet
+
+# How many nearby endpoints to consider when looking for improving moves
+NEIGHBOURS = 8
+
+
+def pen_up_distance(paths: PathSet, origin=(0, 0)) -> float:
+    """
+    Total distance travelled with the pen up, starting from origin and drawing the paths in order.
+    """
+    if len(paths) == 0:
+        return 0.0
+    entries = paths.coords[paths.offsets[:-1]]
+    exits = np.vstack((origin, paths.coords[paths.offsets[1:] - 1]))
+    return float(np.linalg.norm(entries - exits[:-1], axis=1).sum())
+
+
+def greedy_order(
+    starts: np.ndarray, ends: np.ndarray, origin=(0, 0)
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Repeatedly draw the path with an endpoint nearest the pen, entering it at that endpoint. The KD-tree over
+    the endpoints can't drop visited paths, so it is rebuilt over the remaining paths whenever half of them
+    have been drawn.
+    Args:
+        starts: (n, 2) array of the first point of each path
+        ends: (n, 2) array of the last point of each path
+        origin: Where the pen starts
+
+    Returns: The order to draw the paths in, and whether to draw each one (indexed by path) backwards
+    """
+    n = len(starts)
+    order = np.empty(n, dtype=int)
+    flipped = np.zeros(n, dtype=bool)
+    drawn = np.zeros(n, dtype=bool)
+    pen = np.asarray(origin, dtype=float)
+    remaining = np.arange(n)
+    tree = None
+    for step in range(n):
+        if tree is None or len(remaining) > 2 * (n - step):
+            remaining = np.flatnonzero(~drawn)
+            tree = KDTree(np.vstack((starts[remaining], ends[remaining])))
+        k = NEIGHBOURS
+        while True:
+            _, found = tree.query(pen, k=min(k, tree.n))
+            found = np.atleast_1d(found)
+            paths = remaining[found % len(remaining)]
+            fresh = np.flatnonzero(~drawn[paths])
+            if len(fresh) or k >= tree.n:
+                break
+            k *= 4
+        endpoint = found[fresh[0]]
+        path = remaining[endpoint % len(remaining)]
+        order[step] = path
+        drawn[path] = True
+        flipped[path] = endpoint >= len(remaining)
+        pen = starts[path] if flipped[path] else ends[path]
+    return order, flipped
+
+
+class _Tour(object):
+    """
+    A drawing order being improved. Position 0 is a fixed stand-in for the origin and path k is node k + 1.
+    """
+
+    def __init__(self, starts, ends, origin, order, flipped):
+        starts = np.vstack((origin, starts))
+        ends = np.vstack((origin, ends))
+        # Plain floats are much faster than numpy scalars for the one-at-a-time lookups below
+        self.starts = starts.tolist()
+        self.ends = ends.tolist()
+        self.order = np.concatenate(([0], order + 1))
+        self.flipped = np.concatenate(([False], flipped))
+        self.position = np.empty(len(self.order), dtype=int)
+        self.position[self.order] = np.arange(len(self.order))
+        # The nodes with an endpoint near each node's start and end
+        n = len(self.order)
+        endpoints = np.vstack((starts, ends))
+        _, near = KDTree(endpoints).query(endpoints, k=min(NEIGHBOURS + 1, 2 * n))
+        self.near = near.reshape(2, n, -1).transpose(1, 0, 2) % n
+
+    def entry(self, i: int) -> list[float]:
+        node = self.order[i]
+        return self.ends[node] if self.flipped[node] else self.starts[node]
+
+    def exit(self, i: int) -> list[float]:
+        node = self.order[i]
+        return self.starts[node] if self.flipped[node] else self.ends[node]
+
+    def gap(self, a: list[float], i: int) -> float:
+        # Travel from point a to the entry of position i, nothing past the end of the tour
+        if i >= len(self.order):
+            return 0.0
+        b = self.entry(i)
+        return math.hypot(b[0] - a[0], b[1] - a[1])
+
+    def two_opt_gain(self, i: int, j: int) -> float:
+        # Gain from reversing positions i + 1 to j
+        exit_i, exit_j = self.exit(i), self.exit(j)
+        before = self.gap(exit_i, i + 1) + self.gap(exit_j, j + 1)
+        after = math.hypot(exit_j[0] - exit_i[0], exit_j[1] - exit_i[1])
+        after += self.gap(self.entry(i + 1), j + 1)
+        return before - after
+
+    def reverse(self, i: int, j: int):
+        segment = self.order[i + 1 : j + 1][::-1].copy()
+        self.order[i + 1 : j + 1] = segment
+        self.flipped[segment] = ~self.flipped[segment]
+        self.position[segment] = np.arange(i + 1, j + 1)
+
+    def move_gain(self, p: int, q: int, flip: bool) -> float:
+        """
+        Gain from moving the path at position p to just after position q, flipping it if asked.
+        """
+        entry_p, exit_p = self.entry(p), self.exit(p)
+        removed = self.gap(self.exit(p - 1), p) + self.gap(exit_p, p + 1)
+        if p + 1 < len(self.order):
+            removed -= self.gap(self.exit(p - 1), p + 1)
+        if flip:
+            entry_p, exit_p = exit_p, entry_p
+        exit_q = self.exit(q)
+        added = math.hypot(entry_p[0] - exit_q[0], entry_p[1] - exit_q[1])
+        added += self.gap(exit_p, q + 1) - self.gap(exit_q, q + 1)
+        return removed - added
+
+    def move(self, p: int, q: int, flip: bool):
+        node = self.order[p]
+        if flip:
+            self.flipped[node] = not self.flipped[node]
+        if q > p:
+            self.order[p:q] = self.order[p + 1 : q + 1].copy()
+            self.order[q] = node
+            lo, hi = p, q + 1
+        else:
+            self.order[q + 2 : p + 1] = self.order[q + 1 : p].copy()
+            self.order[q + 1] = node
+            lo, hi = q + 1, p + 1
+        self.position[self.order[lo:hi]] = np.arange(lo, hi)
+
+    def improve(self, deadline: float):
+        """
+        Apply improving 2-opt and Or-opt moves between nearby endpoints until none are left or time runs out.
+        """
+        n = len(self.order)
+        improved = True
+        while improved:
+            improved = False
+            for i in range(n - 1):
+                if i % 256 == 0 and time.monotonic() >= deadline:
+                    return
+                # 2-opt: join this path's exit to a nearby path's exit, reversing everything between them
+                node = self.order[i]
+                for other in self.near[node, 0 if self.flipped[node] else 1]:
+                    a, b = sorted((i, self.position[other]))
+                    if a != b and self.two_opt_gain(a, b) > 1e-9:
+                        self.reverse(a, b)
+                        improved = True
+                        break
+                # Or-opt: move the next path to sit after a path with an end near either of its ends
+                p = i + 1
+                for other in self.near[self.order[p]].ravel():
+                    q = self.position[other]
+                    if q == p or q == p - 1:
+                        continue
+                    gains = [self.move_gain(p, q, flip) for flip in (False, True)]
+                    if max(gains) > 1e-9:
+                        self.move(p, q, gains[1] > gains[0])
+                        improved = True
+                        break
+
+
+def order_paths(paths: PathSet, time_budget: float = 1.0, origin=(0, 0)) -> PathSet:
+    """
+    Reorder and reverse paths to cut the distance travelled with the pen up.
+    Args:
+        paths: The paths to draw
+        time_budget: Seconds to spend improving the greedy order
+        origin: Where the pen starts
+
+    Returns: The same paths in the new order, some of them reversed
+    """
+    if len(paths) < 2:
+        return paths
+    starts = paths.coords[paths.offsets[:-1]]
+    ends = paths.coords[paths.offsets[1:] - 1]
+    deadline = time.monotonic() + time_budget
+    order, flipped = greedy_order(starts, ends, origin)
+    tour = _Tour(starts, ends, origin, order, flipped)
+    tour.improve(deadline)
+    order = tour.order[1:] - 1
+    flipped = tour.flipped[1:][order]
+    lengths = paths.lengths[order]
+    offsets = np.concatenate(([0], np.cumsum(lengths)))
+    steps = np.arange(offsets[-1]) - np.repeat(offsets[:-1], lengths)
+    first = np.repeat(paths.offsets[order], lengths)
+    last = np.repeat(paths.offsets[order + 1] - 1, lengths)
+    points = np.where(np.repeat(flipped, lengths), last - steps, first + steps)
+    return PathSet(paths.coords[points], offsets)
+
+
+def order_drawing(
+    drawing: axi.Drawing, time_budget: float = 1.0, verbose: bool = False
+) -> axi.Drawing:
+    """
+    order_paths for a Drawing, optionally printing the pen-up distance before and after.
+    """
+    paths = PathSet.from_drawing(drawing)
+    ordered = order_paths(paths, time_budget)
+    if verbose:
+        print(
+            f"Pen-up distance: {pen_up_distance(paths):.1f} -> "
+            f"{pen_up_distance(ordered):.1f}"
+        )
+    return ordered.to_drawing()
@@ -0,0 +1,156 @@
+"""
+A compact set of paths: every point in one contiguous (n, 2) float array, plus the index where each path starts.
+Transforms are whole-array operations instead of rebuilding lists of tuples, and slicing shares the coordinates
+with the original set.
+"""
+from typing import Iterator, Union
+
+import axi
+import numpy as np
+
+
+def pack_paths(paths) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Pack a list of paths into one contiguous coordinate array.
+    Args:
+        paths: A list of paths, each a sequence of (x, y) points
+
+    Returns: An (n, 2) array of every point and an array of the index where each path starts, followed by n
+    """
+    lengths = [len(path) for path in paths]
+    coords = np.array([point for path in paths for point in path], dtype=float)
+    offsets = np.concatenate(([0], np.cumsum(lengths, dtype=int)))
+    return coords.reshape(-1, 2), offsets
+
+
+def unpack_paths(
+    coords: np.ndarray, offsets: np.ndarray
+) -> list[list[tuple[float, float]]]:
+    points = list(map(tuple, coords.tolist()))
+    return [points[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+
+
+def concatenate_packed(
+    packed: list[tuple[np.ndarray, np.ndarray]]
+) -> tuple[np.ndarray, np.ndarray]:
+    if len(packed) == 0:
+        return np.empty((0, 2)), np.zeros(1, dtype=int)
+    coords = np.concatenate([c for c, _ in packed])
+    starts = np.cumsum([0] + [len(c) for c, _ in packed[:-1]])
+    offsets = np.concatenate(
+        [[0]] + [o[1:] + start for (_, o), start in zip(packed, starts)]
+    )
+    return coords, offsets.astype(int)
+
+
+class PathSet(object):
+    def __init__(self, coords: np.ndarray = None, offsets: np.ndarray = None):
+        """
+        Args:
+            coords: (n, 2) array of every point of every path. No coords gives an empty set
+            offsets: Index of the first point of each path, followed by n. No offsets makes coords one path
+        """
+        if coords is None:
+            coords, offsets = np.empty((0, 2)), np.zeros(1, dtype=int)
+        self.coords = np.asarray(coords, dtype=float).reshape(-1, 2)
+        if offsets is None:
+            offsets = [0, len(self.coords)]
+        self.offsets = np.asarray(offsets, dtype=int)
+
+    @classmethod
+    def from_paths(cls, paths) -> "PathSet":
+        return cls(*pack_paths(paths))
+
+    @classmethod
+    def from_drawing(cls, drawing: axi.Drawing) -> "PathSet":
+        return cls.from_paths(drawing.paths)
+
+    @classmethod
+    def concatenate(cls, pathsets: list["PathSet"]) -> "PathSet":
+        return cls(*concatenate_packed([(p.coords, p.offsets) for p in pathsets]))
+
+    @property
+    def paths(self) -> list[list[tuple[float, float]]]:
+        return unpack_paths(self.coords, self.offsets)
+
+    def to_drawing(self) -> axi.Drawing:
+        return axi.Drawing(self.paths)
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        for start, end in zip(self.offsets[:-1], self.offsets[1:]):
+            yield self.coords[start:end]
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[np.ndarray, "PathSet"]:
+        """
+        An int gives a view of that path's points. A contiguous slice gives a PathSet viewing the same
+        coordinates; other slices copy the selected paths.
+        """
+        if not isinstance(index, slice):
+            index = range(len(self))[index]
+            return self.coords[self.offsets[index] : self.offsets[index + 1]]
+        start, stop, step = index.indices(len(self))
+        if step == 1:
+            stop = max(start, stop)
+            offsets = self.offsets[start : stop + 1]
+            return PathSet(self.coords[offsets[0] : offsets[-1]], offsets - offsets[0])
+        selected = np.arange(start, stop, step)
+        lengths = self.lengths[selected]
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+        points = np.repeat(self.offsets[selected] - offsets[:-1], lengths)
+        return PathSet(self.coords[points + np.arange(offsets[-1])], offsets)
+
+    @property
+    def bounds(self) -> tuple[float, float, float, float]:
+        if len(self.coords) == 0:
+            return 0, 0, 0, 0
+        min_x, min_y = self.coords.min(axis=0)
+        max_x, max_y = self.coords.max(axis=0)
+        return min_x, min_y, max_x, max_y
+
+    @property
+    def width(self) -> float:
+        min_x, _, max_x, _ = self.bounds
+        return max_x - min_x
+
+    @property
+    def height(self) -> float:
+        _, min_y, _, max_y = self.bounds
+        return max_y - min_y
+
+    @property
+    def size(self) -> tuple[float, float]:
+        return self.width, self.height
+
+    def transform(self, matrix: np.ndarray, offset=(0, 0)) -> "PathSet":
+        """
+        Apply the affine map p -> matrix @ p + offset to every point. The result shares offsets with this set.
+        """
+        return PathSet(self.coords @ np.asarray(matrix).T + offset, self.offsets)
+
+    def translate(self, dx: float, dy: float) -> "PathSet":
+        return PathSet(self.coords + (dx, dy), self.offsets)
+
+    def scale(self, sx: float, sy: float = None) -> "PathSet":
+        sy = sx if sy is None else sy
+        return PathSet(self.coords * (sx, sy), self.offsets)
+
+    def rotate_radians(self, angle: float, center=(0, 0)) -> "PathSet":
+        """
+        Rotate counterclockwise by angle radians about center. The unit is in the name so PathSet and Drawing
+        rotations can't be mixed up where both are in use.
+        """
+        c, s = np.cos(angle), np.sin(angle)
+        center = np.asarray(center, dtype=float)
+        matrix = np.array([[c, -s], [s, c]])
+        return self.transform(matrix, center - matrix @ center)
+
+    def origin(self) -> "PathSet":
+        min_x, min_y, _, _ = self.bounds
+        return self.translate(-min_x, -min_y)
@@ -0,0 +1,123 @@
+"""
+Reducing the number of points in densely sampled paths. Generators sample curves finely and evenly, so most of
+their points sit on nearly straight stretches and only add to memory use and the plotter's command stream. Both
+methods here work on every path of a PathSet at once and only ever keep existing points.
+"""
+import axi
+import numpy as np
+
+from axi_art.pathset import PathSet
+
+
+def _segment_distances(
+    points: np.ndarray, starts: np.ndarray, ends: np.ndarray
+) -> np.ndarray:
+    # Distance from each point to the segment between the matching start and end
+    direction = ends - starts
+    length_sq = np.einsum("ij,ij->i", direction, direction)
+    t = np.einsum("ij,ij->i", points - starts, direction)
+    t = np.clip(t / np.where(length_sq > 0, length_sq, 1), 0, 1)
+    return np.linalg.norm(points - starts - t[:, None] * direction, axis=1)
+
+
+def _select(paths: PathSet, keep: np.ndarray) -> PathSet:
+    kept = np.concatenate(([0], np.cumsum(keep)))
+    offsets = kept[paths.offsets]
+    return PathSet(paths.coords[keep], offsets)
+
+
+def simplify(paths: PathSet, tolerance: float) -> PathSet:
+    """
+    Ramer-Douglas-Peucker simplification of every path at once. Each pass takes every open interval of every
+    path, finds the point furthest from the chord across it, and splits the intervals whose furthest point is
+    more than tolerance away, so the number of passes depends on how finely the paths are split rather than on
+    how many paths there are.
+    Args:
+        paths: The paths to simplify
+        tolerance: Furthest any dropped point may be from the simplified path
+
+    Returns: The simplified paths, no point of the originals further than tolerance from them
+    """
+    keep = np.zeros(len(paths.coords), dtype=bool)
+    keep[paths.offsets[:-1][paths.lengths > 0]] = True
+    keep[paths.offsets[1:][paths.lengths > 0] - 1] = True
+    long = paths.lengths > 2
+    starts, ends = paths.offsets[:-1][long], paths.offsets[1:][long] - 1
+    while len(starts):
+        counts = ends - starts - 1
+        interval = np.repeat(np.arange(len(starts)), counts)
+        points = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        points += starts[interval] + 1
+        distances = _segment_distances(
+            paths.coords[points],
+            paths.coords[starts[interval]],
+            paths.coords[ends[interval]],
+        )
+        furthest = np.maximum.reduceat(distances, np.cumsum(counts) - counts)
+        split = furthest > tolerance
+        # The first point in each interval reaching its maximum
+        hits = np.flatnonzero(distances == furthest[interval])
+        _, first_hit = np.unique(interval[hits], return_index=True)
+        middles = points[hits[first_hit]][split]
+        keep[middles] = True
+        starts = np.concatenate((starts[split], middles))
+        ends = np.concatenate((middles, ends[split]))
+        wide = ends - starts > 1
+        starts, ends = starts[wide], ends[wide]
+    return _select(paths, keep)
+
+
+def adaptive_resample(
+    paths: PathSet, tolerance: float, corner: float = np.pi / 4
+) -> PathSet:
+    """
+    Thin out points according to how sharply each path bends. A chord of length L across a curve with curvature
+    k strays k * L**2 / 8 from it, so points are kept at roughly every sqrt(8 * tolerance / k) along the path,
+    estimating curvature from the turn at each point. This is faster than simplify and spaces points smoothly,
+    but the error is only close to tolerance when the original points are much closer together than the
+    spacing picked, and points turning more than corner radians are always kept.
+    Args:
+        paths: The paths to resample, sampled finely enough that their points trace the curve
+        tolerance: Roughly how far the resampled paths may stray from the originals
+        corner: Turns in radians sharper than this are always kept
+
+    Returns: The resampled paths
+    """
+    coords, offsets = paths.coords, paths.offsets
+    if len(coords) == 0:
+        return paths
+    steps = np.diff(coords, axis=0)
+    step_lengths = np.linalg.norm(steps, axis=1)
+    # Turning angle at each point between consecutive steps, ignoring those across path boundaries
+    headings = np.arctan2(steps[:, 1], steps[:, 0])
+    turns = np.abs((np.diff(headings) + np.pi) % (2 * np.pi) - np.pi)
+    turns = np.concatenate(([0], turns, [0]))
+    first, last = offsets[:-1][paths.lengths > 0], offsets[1:][paths.lengths > 0] - 1
+    turns[first] = turns[last] = 0
+    span = np.concatenate(([0], step_lengths)) + np.concatenate((step_lengths, [0]))
+    curvature = 2 * turns / np.where(span > 0, span, np.inf)
+    # Number of points needed along each step, judging its curvature by its sharper end
+    step_curvature = np.maximum(curvature[:-1], curvature[1:])
+    needed = step_lengths * np.sqrt(step_curvature / (8 * tolerance))
+    between_paths = offsets[1:-1] - 1
+    needed[between_paths[(between_paths >= 0) & (between_paths < len(steps))]] = 0
+    walked = np.concatenate(([0], np.cumsum(needed)))
+    walked -= np.repeat(walked[first], paths.lengths[paths.lengths > 0])
+    counted = np.floor(walked)
+    keep = np.concatenate(([True], counted[1:] > counted[:-1]))
+    keep |= turns > corner
+    keep[first] = keep[last] = True
+    return _select(paths, keep)
+
+
+def simplify_drawing(
+    drawing: axi.Drawing, tolerance: float, verbose: bool = False
+) -> axi.Drawing:
+    """
+    simplify for a Drawing, optionally printing the number of points before and after.
+    """
+    paths = PathSet.from_drawing(drawing)
+    simplified = simplify(paths, tolerance)
+    if verbose:
+        print(f"Points: {len(paths.coords)} -> {len(simplified.coords)}")
+    return simplified.to_drawing()
@@ -0,0 +1,122 @@
+"""
+Ridge line renderer: a stack of horizontal lines, each displaced vertically by the height field beneath it, with
+the lines in front optionally hiding the ones behind. Works with any 2D array of heights, such as noise, image
+luminance or elevation data.
+"""
+from typing import Callable, Optional
+
+import numpy as np
+
+from axi_art.sampling import SAMPLERS
+
+
+def cosine_envelope(x: np.ndarray, width: float) -> np.ndarray:
+    """
+    Envelope that rises from 0 at both ends of a line to 1 in the middle.
+    """
+    return (1 - np.cos(2 * np.pi * x / width)) / 2
+
+
+def _crossings(line: np.ndarray, depth: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """
+    Interpolate where each segment starting at the given indices crosses the horizon.
+    Args:
+        line: (samples, 2) array of points
+        depth: Height of each point above the horizon, positive where hidden
+        starts: Indices of the first point of each crossing segment
+
+    Returns: (len(starts), 2) array of crossing points
+    """
+    t = depth[starts] / (depth[starts] - depth[starts + 1])
+    return line[starts] + t[:, None] * (line[starts + 1] - line[starts])
+
+
+def occlude(paths) -> list[list[tuple[float, float]]]:
+    """
+    Hide the parts of each line that fall behind the lines in front of it. Later lines are in front, and a point
+    is hidden when it lies below any of them. Lines are swept front to back against a running horizon, so the
+    cost is linear in the number of points, and visible runs are clipped exactly where they cross the horizon.
+    Args:
+        paths: Lines that all share the same x sample positions
+
+    Returns: List of visible paths
+    """
+    lines = np.asarray(paths, dtype=float)
+    samples = lines.shape[1]
+    horizon = np.full(samples, np.inf)
+    out = []
+    for line in lines[::-1]:
+        visible_paths = []
+        depth = line[:, 1] - horizon
+        visible = depth <= 0
+        edges = np.diff(visible.astype(np.int8))
+        starts = np.flatnonzero(edges == 1) + 1
+        ends = np.flatnonzero(edges == -1)
+        if visible[0]:
+            starts = np.insert(starts, 0, 0)
+        if visible[-1]:
+            ends = np.append(ends, samples - 1)
+        enter = np.empty((len(starts), 2))
+        leave = np.empty((len(ends), 2))
+        entering = starts > 0
+        leaving = ends < samples - 1
+        enter[entering] = _crossings(line, depth, starts[entering] - 1)
+        leave[leaving] = _crossings(line, depth, ends[leaving])
+        for start, end, a, b in zip(starts, ends, enter, leave):
+            path = [line[start : end + 1]]
+            if start > 0:
+                path.insert(0, a[None])
+            if end < samples - 1:
+                path.append(b[None])
+            visible_paths.append([tuple(p) for p in np.concatenate(path).tolist()])
+        out.append(visible_paths)
+        np.minimum(horizon, line[:, 1], out=horizon)
+    return [path for visible_paths in out[::-1] for path in visible_paths]
+
+
+def ridge_lines(
+    heights: np.ndarray,
+    lines: int,
+    samples: int,
+    width: float,
+    height: float,
+    amp: float,
+    envelope: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+    carrier: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+    occluded: bool = False,
+    interpolation: str = "bilinear",
+) -> list[list[tuple[float, float]]]:
+    """
+    Render a height field as a stack of displaced horizontal lines.
+    Args:
+        heights: 2D array of heights stretched over the drawing, row r and column c sitting at
+            (c * width / columns, r * height / rows)
+        lines: Number of lines
+        samples: Number of points per line
+        width: Width of the drawing
+        height: Height of the drawing
+        amp: Displacement of a height of 1
+        envelope: Function of the x coordinates scaling the displacement along each line
+        carrier: Function of the x coordinates modulating the displacement, e.g. a sine wave
+        occluded: Hide the parts of lines that fall behind the lines in front of them
+        interpolation: How to sample heights between entries, one of the sampling.SAMPLERS names
+
+    Returns: List of paths
+    """
+    ys = np.arange(lines) * height / lines
+    xs = np.arange(samples) * width / samples
+    rows = np.arange(lines) * heights.shape[0] / lines
+    cols = np.arange(samples) * heights.shape[1] / samples
+    scale = np.full(samples, float(amp))
+    if envelope is not None:
+        scale = scale * envelope(xs)
+    if carrier is not None:
+        scale = scale * carrier(xs)
+    y = ys[:, None] + scale[None, :] * SAMPLERS[interpolation](
+        heights, cols[None, :], rows[:, None]
+    )
+    x = np.broadcast_to(xs, y.shape)
+    paths = np.stack([x, y], axis=-1)
+    if occluded:
+        return occlude(paths)
+    return [[tuple(p) for p in line] for line in paths.tolist()]
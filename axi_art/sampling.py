@@ -0,0 +1,90 @@
+"""
+Batched sampling of images and other 2D arrays, such as height fields, at fractional pixel coordinates.
+Coordinates outside the array are clamped to its edge. Arrays can be 2D or have a trailing channel axis, in which
+case every channel is sampled.
+"""
+import numpy as np
+
+
+def _clamped(pixels: np.ndarray, x, y) -> tuple[np.ndarray, np.ndarray]:
+    x, y = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+    return np.clip(x, 0, pixels.shape[1] - 1), np.clip(y, 0, pixels.shape[0] - 1)
+
+
+def _channel_weights(pixels: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    return weights[..., None] if pixels.ndim == 3 else weights
+
+
+def nearest(pixels: np.ndarray, x, y) -> np.ndarray:
+    """
+    Sample the nearest pixel to each coordinate.
+    Args:
+        pixels: (height, width) or (height, width, channels) image
+        x: Array of column coordinates
+        y: Array of row coordinates, broadcast against x
+
+    Returns: Array of samples in the broadcast shape of x and y, followed by the channel axis if there is one
+    """
+    x, y = _clamped(pixels, x, y)
+    return pixels[np.rint(y).astype(int), np.rint(x).astype(int)].astype(float)
+
+
+def bilinear(pixels: np.ndarray, x, y) -> np.ndarray:
+    """
+    Interpolate the image linearly between the four pixels around each coordinate.
+    Args:
+        pixels: (height, width) or (height, width, channels) image
+        x: Array of column coordinates
+        y: Array of row coordinates, broadcast against x
+
+    Returns: Array of samples in the broadcast shape of x and y, followed by the channel axis if there is one
+    """
+    x, y = _clamped(pixels, x, y)
+    x0 = np.floor(x).astype(int)
+    y0 = np.floor(y).astype(int)
+    x1 = np.minimum(x0 + 1, pixels.shape[1] - 1)
+    y1 = np.minimum(y0 + 1, pixels.shape[0] - 1)
+    x_off = _channel_weights(pixels, x - x0)
+    y_off = _channel_weights(pixels, y - y0)
+    top = (1 - x_off) * pixels[y0, x0] + x_off * pixels[y0, x1]
+    bottom = (1 - x_off) * pixels[y1, x0] + x_off * pixels[y1, x1]
+    return (1 - y_off) * top + y_off * bottom
+
+
+def _catmull_rom_weights(t: np.ndarray) -> list[np.ndarray]:
+    t2 = t * t
+    t3 = t2 * t
+    return [
+        (-t3 + 2 * t2 - t) / 2,
+        (3 * t3 - 5 * t2 + 2) / 2,
+        (-3 * t3 + 4 * t2 + t) / 2,
+        (t3 - t2) / 2,
+    ]
+
+
+def bicubic(pixels: np.ndarray, x, y) -> np.ndarray:
+    """
+    Interpolate the image with a Catmull-Rom spline through the 4x4 pixels around each coordinate. Smoother than
+    bilinear sampling, but can overshoot the range of the pixels around sharp edges.
+    Args:
+        pixels: (height, width) or (height, width, channels) image
+        x: Array of column coordinates
+        y: Array of row coordinates, broadcast against x
+
+    Returns: Array of samples in the broadcast shape of x and y, followed by the channel axis if there is one
+    """
+    x, y = _clamped(pixels, x, y)
+    x0 = np.floor(x).astype(int)
+    y0 = np.floor(y).astype(int)
+    x_weights = _catmull_rom_weights(_channel_weights(pixels, x - x0))
+    y_weights = _catmull_rom_weights(_channel_weights(pixels, y - y0))
+    out = 0
+    for dy, y_weight in zip(range(-1, 3), y_weights):
+        row = np.clip(y0 + dy, 0, pixels.shape[0] - 1)
+        for dx, x_weight in zip(range(-1, 3), x_weights):
+            col = np.clip(x0 + dx, 0, pixels.shape[1] - 1)
+            out = out + y_weight * x_weight * pixels[row, col]
+    return out
+
+
+SAMPLERS = {"nearest": nearest, "bilinear": bilinear, "bicubic": bicubic}
@@ -9,6 +9,8 @@ from axi import Drawing
 from scipy.spatial import KDTree
 from shapely.geometry import MultiLineString
 
+from axi_art.dedup import dedup_drawing
+
 path_list = list[list[tuple[float, float]]]
 
 
@@ -122,7 +124,10 @@ def main(
     small_flake = overlay(big_flake, small_flake)
     layers = [small_flake, big_flake]
     layers = Drawing.multi_scale_to_fit(layers, width, height, margin)
-    layers = [layer.join_paths(0.01).sort_paths() for layer in layers]
+    layers = [
+        dedup_drawing(layer, 1e-4, verbose=True).join_paths(0.01).sort_paths()
+        for layer in layers
+    ]
     if test or axi.device.find_port() is None:
         im = Drawing.render_layers(layers, bounds=(0, 0, width, height))
         im.write_to_png("snowflake_preview.png")
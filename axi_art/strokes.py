@@ -0,0 +1,193 @@
+"""
+Stroke assembly: joins paths that share endpoints into as few continuous pen strokes as possible. Endpoints within
+a tolerance are snapped together with a spatial hash, every path becomes an edge of the resulting graph, and
+strokes are read off as Eulerian trails. A connected piece with 2k odd-degree vertices needs k strokes, or a
+single closed stroke if it has none.
+"""
+import math
+from collections import defaultdict
+
+import axi
+import numpy as np
+
+from axi_art.pathset import PathSet
+
+
+def snap_points(points: np.ndarray, tolerance: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Merge points that are within tolerance of an earlier point, bucketing them into a grid of tolerance sized
+    cells so each point is only compared with those in the 3x3 cells around it.
+    Args:
+        points: (n, 2) array of points
+        tolerance: Distance within which points are merged
+
+    Returns: The vertex each point was merged into, and the (m, 2) array of vertex positions
+    """
+    if tolerance <= 0:
+        unique, labels = np.unique(points, axis=0, return_inverse=True)
+        return labels.reshape(-1), unique
+    cells = defaultdict(list)
+    vertices = []
+    labels = np.empty(len(points), dtype=int)
+    for i, (x, y) in enumerate(points.tolist()):
+        cx, cy = math.floor(x / tolerance), math.floor(y / tolerance)
+        label = None
+        for key in [(cx + dx, cy + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]:
+            for vertex in cells.get(key, ()):
+                vx, vy = vertices[vertex]
+                if math.hypot(vx - x, vy - y) <= tolerance:
+                    label = vertex
+                    break
+            if label is not None:
+                break
+        if label is None:
+            label = len(vertices)
+            vertices.append((x, y))
+            cells[(cx, cy)].append(label)
+        labels[i] = label
+    return labels, np.array(vertices, dtype=float).reshape(-1, 2)
+
+
+def duplicate_short_edges(
+    u: np.ndarray, v: np.ndarray, lengths: np.ndarray, vertices: int, max_length: float
+) -> np.ndarray:
+    """
+    Choose edges to draw twice so their ends stop being odd, each one saving a pen lift at the cost of
+    retracing the edge. Edges are taken shortest first while both of their ends are still odd.
+    Args:
+        u: First vertex of each edge
+        v: Second vertex of each edge
+        lengths: Length of each edge
+        vertices: Number of vertices
+        max_length: Longest edge worth retracing
+
+    Returns: Indices of the edges to duplicate
+    """
+    odd = (np.bincount(u, minlength=vertices) + np.bincount(v, minlength=vertices)) % 2
+    odd = odd.astype(bool)
+    chosen = []
+    for edge in np.argsort(lengths, kind="stable"):
+        if lengths[edge] > max_length:
+            break
+        a, b = u[edge], v[edge]
+        if a != b and odd[a] and odd[b]:
+            odd[a] = odd[b] = False
+            chosen.append(edge)
+    return np.array(chosen, dtype=int)
+
+
+def euler_trails(u: np.ndarray, v: np.ndarray, vertices: int) -> list[list[int]]:
+    """
+    Split a multigraph's edges into the fewest trails. A virtual vertex is joined to every odd vertex, which
+    makes every degree even, and Hierholzer's algorithm walks an Eulerian circuit of each connected piece; the
+    circuits are then cut wherever they pass through the virtual vertex.
+    Args:
+        u: First vertex of each edge
+        v: Second vertex of each edge
+        vertices: Number of vertices
+
+    Returns: The trails as lists of edge indices, where ~edge means the edge is walked from v to u
+    """
+    degree = np.bincount(u, minlength=vertices) + np.bincount(v, minlength=vertices)
+    odd = np.flatnonzero(degree % 2)
+    virtual = vertices
+    # Virtual edges come after the real ones
+    ends_u = np.concatenate((u, odd))
+    ends_v = np.concatenate((v, np.full(len(odd), virtual)))
+    real = len(u)
+    adjacency = [[] for _ in range(vertices + 1)]
+    for edge, (a, b) in enumerate(zip(ends_u.tolist(), ends_v.tolist())):
+        adjacency[a].append(edge)
+        adjacency[b].append(edge)
+    used = np.zeros(len(ends_u), dtype=bool)
+    pointer = [0] * (vertices + 1)
+    trails = []
+    starts = [virtual] if len(odd) else []
+    starts += list(range(vertices))
+    for start in starts:
+        if pointer[start] == len(adjacency[start]):
+            continue
+        # Iterative Hierholzer: each stack entry is a vertex and the signed edge used to reach it
+        stack = [(start, None)]
+        circuit = []
+        while stack:
+            vertex, arrived_by = stack[-1]
+            edges = adjacency[vertex]
+            while pointer[vertex] < len(edges) and used[edges[pointer[vertex]]]:
+                pointer[vertex] += 1
+            if pointer[vertex] == len(edges):
+                stack.pop()
+                circuit.append(arrived_by)
+                continue
+            edge = edges[pointer[vertex]]
+            used[edge] = True
+            forward = ends_u[edge] == vertex
+            stack.append(
+                (ends_v[edge] if forward else ends_u[edge], edge if forward else ~edge)
+            )
+        circuit = circuit[::-1][1:]
+        trail = []
+        for step in circuit:
+            if (step if step >= 0 else ~step) >= real:
+                if trail:
+                    trails.append(trail)
+                trail = []
+            else:
+                trail.append(step)
+        if trail:
+            trails.append(trail)
+    return trails
+
+
+def assemble_strokes(
+    paths: PathSet, tolerance: float = 1e-6, max_duplicate: float = 0
+) -> PathSet:
+    """
+    Join paths into continuous strokes wherever their ends meet.
+    Args:
+        paths: The paths, typically many short segments
+        tolerance: Distance within which path ends count as meeting
+        max_duplicate: Edges up to this long may be drawn twice when that saves a pen lift
+
+    Returns: The strokes
+    """
+    lengths = paths.lengths
+    keep = np.flatnonzero(lengths > 0)
+    if len(keep) == 0:
+        return PathSet()
+    first = paths.offsets[keep]
+    last = paths.offsets[keep + 1] - 1
+    labels, vertices = snap_points(
+        np.vstack((paths.coords[first], paths.coords[last])), tolerance
+    )
+    u, v = labels[: len(keep)], labels[len(keep) :]
+    edges = keep
+    if max_duplicate > 0:
+        steps = np.linalg.norm(np.diff(paths.coords, axis=0), axis=1)
+        walked = np.concatenate(([0], np.cumsum(steps)))
+        edge_lengths = walked[last] - walked[first]
+        extra = duplicate_short_edges(u, v, edge_lengths, len(vertices), max_duplicate)
+        u, v = np.concatenate((u, u[extra])), np.concatenate((v, v[extra]))
+        edges = np.concatenate((keep, keep[extra]))
+    strokes = []
+    for trail in euler_trails(u, v, len(vertices)):
+        pieces = []
+        for step in trail:
+            path = paths[edges[step if step >= 0 else ~step]]
+            path = path if step >= 0 else path[::-1]
+            # Consecutive edges share a vertex, so drop the repeated point
+            pieces.append(path if not pieces else path[1:])
+        strokes.append(np.concatenate(pieces))
+    offsets = np.concatenate(([0], np.cumsum([len(s) for s in strokes])))
+    return PathSet(np.concatenate(strokes), offsets)
+
+
+def assemble_drawing(
+    drawing: axi.Drawing, tolerance: float = 1e-6, max_duplicate: float = 0
+) -> axi.Drawing:
+    """
+    assemble_strokes for a Drawing.
+    """
+    return assemble_strokes(
+        PathSet.from_drawing(drawing), tolerance, max_duplicate
+    ).to_drawing()
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import numpy as np
+from shapely.geometry import Polygon
+
+
+def polygon_edges(shapes: list[Polygon]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Collect the exterior edges of a list of polygons as arrays.
+    Args:
+        shapes: The polygons
+
+    Returns: A (k, 2, 2) array of edge segments and a (k,) array of the index of the polygon each belongs to
+    """
+    segments = []
+    owners = []
+    for i, shape in enumerate(shapes):
+        ring = np.asarray(shape.exterior.coords)
+        segments.append(np.stack((ring[:-1], ring[1:]), axis=1))
+        owners.append(np.full(len(ring) - 1, i))
+    if len(segments) == 0:
+        return np.empty((0, 2, 2)), np.empty(0, dtype=int)
+    return np.concatenate(segments), np.concatenate(owners)
+
+
+def rect_edges(width: float, height: float) -> np.ndarray:
+    corners = np.array([(0, 0), (width, 0), (width, height), (0, height), (0, 0)])
+    return np.stack((corners[:-1], corners[1:]), axis=1).astype(float)
+
+
+def ray_segment_distances(
+    origins: np.ndarray, directions: np.ndarray, segments: np.ndarray
+) -> np.ndarray:
+    """
+    Intersect every ray with every segment.
+    Args:
+        origins: (m, 2) array of ray origins
+        directions: (m, 2) array of ray directions, of unit length if distances are wanted
+        segments: (k, 2, 2) array of segments
+
+    Returns: An (m, k) array of how far along each ray it hits each segment, inf where it misses
+    """
+    p = segments[None, :, 0, :]
+    e = segments[None, :, 1, :] - p
+    d = directions[:, None, :]
+    w = p - origins[:, None, :]
+    denom = d[..., 0] * e[..., 1] - d[..., 1] * e[..., 0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = (w[..., 0] * e[..., 1] - w[..., 1] * e[..., 0]) / denom
+        u = (w[..., 0] * d[..., 1] - w[..., 1] * d[..., 0]) / denom
+    hit = (denom != 0) & (t >= 0) & (u >= 0) & (u <= 1)
+    return np.where(hit, t, np.inf)
+
+
+class SegmentBVH:
+    """
+    Bounding volume hierarchy over a fixed set of segments, for finding the first segment each of a batch of
+    rays runs into.
+    """
+
+    def __init__(self, segments: np.ndarray, leaf_size: int = 32):
+        self.segments = segments
+        order = np.arange(len(segments))
+        lows = segments.min(axis=1)
+        highs = segments.max(axis=1)
+        centers = (lows + highs) / 2
+        self.lo: list[np.ndarray] = []
+        self.hi: list[np.ndarray] = []
+        self.children: list[tuple[int, int]] = []
+        self.ranges: list[tuple[int, int]] = []
+        stack = [(0, len(segments), self._new_node())]
+        while stack:
+            start, end, node = stack.pop()
+            members = order[start:end]
+            self.lo[node] = lows[members].min(axis=0, initial=np.inf)
+            self.hi[node] = highs[members].max(axis=0, initial=-np.inf)
+            if end - start <= leaf_size:
+                self.ranges[node] = (start, end)
+                continue
+            # Split at the median centroid along the longest axis of the box
+            axis = int(np.argmax(self.hi[node] - self.lo[node]))
+            mid = (end - start) // 2
+            split = np.argpartition(centers[members, axis], mid)
+            order[start:end] = members[split]
+            left, right = self._new_node(), self._new_node()
+            self.children[node] = (left, right)
+            stack.append((start, start + mid, left))
+            stack.append((start + mid, end, right))
+        self.order = order
+
+    def _new_node(self) -> int:
+        self.lo.append(np.zeros(2))
+        self.hi.append(np.zeros(2))
+        self.children.append((-1, -1))
+        self.ranges.append((0, 0))
+        return len(self.lo) - 1
+
+    def nearest_hits(
+        self, origins: np.ndarray, directions: np.ndarray, t_min: float = 0
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Find the first segment hit by each ray.
+        Args:
+            origins: (m, 2) array of ray origins
+            directions: (m, 2) array of unit ray directions
+            t_min: Hits closer than this to the origin are ignored
+
+        Returns: The distance to the first hit of each ray (inf for a miss) and the index of the segment hit (-1)
+        """
+        best = np.full(len(origins), np.inf)
+        best_idx = np.full(len(origins), -1)
+        with np.errstate(divide="ignore"):
+            inv_dir = 1 / directions
+        stack = [(0, np.arange(len(origins)))]
+        while stack:
+            node, rays = stack.pop()
+            # Slab test against the node's box, keeping rays that could still improve on their best hit
+            o = origins[rays]
+            with np.errstate(invalid="ignore"):
+                t0 = (self.lo[node] - o) * inv_dir[rays]
+                t1 = (self.hi[node] - o) * inv_dir[rays]
+            # A ray parallel to a slab is inside it for every t if its origin is between or on the slab's faces,
+            # and never otherwise. 0 * inf would give nan for an origin on a face, so set these directly
+            parallel = directions[rays] == 0
+            inside = (self.lo[node] <= o) & (o <= self.hi[node])
+            slab_near = np.where(inside, -np.inf, np.inf)
+            slab_far = np.where(inside, np.inf, -np.inf)
+            t_near = np.where(parallel, slab_near, np.minimum(t0, t1)).max(axis=1)
+            t_far = np.where(parallel, slab_far, np.maximum(t0, t1)).min(axis=1)
+            rays = rays[(t_near <= t_far) & (t_far >= t_min) & (t_near <= best[rays])]
+            if len(rays) == 0:
+                continue
+            if self.children[node][0] == -1:
+                start, end = self.ranges[node]
+                members = self.order[start:end]
+                t = ray_segment_distances(
+                    origins[rays], directions[rays], self.segments[members]
+                )
+                t[t <= t_min] = np.inf
+                nearest = np.argmin(t, axis=1)
+                t = t[np.arange(len(rays)), nearest]
+                better = t < best[rays]
+                best[rays[better]] = t[better]
+                best_idx[rays[better]] = members[nearest[better]]
+            else:
+                stack.extend((child, rays) for child in self.children[node])
+        return best, best_idx
@@ -1,73 +1,152 @@
 from __future__ import annotations
 
 from random import shuffle
+from typing import Optional
 
 import axi
 import click
 import numpy as np
 from axi import Drawing
 from shapely.affinity import rotate
-from shapely.geometry import (
-    LineString,
-    MultiLineString,
-    Polygon,
-    GeometryCollection,
-    Point,
+from shapely.geometry import Polygon
+
+from axi_art.sun_rays.raycast import (
+    SegmentBVH,
+    polygon_edges,
+    ray_segment_distances,
+    rect_edges,
 )
 
 rng = np.random.default_rng()
 
 
-def nearest_point(p: Point, c: GeometryCollection) -> Point:
-    if isinstance(c, Point):
-        return c
-    points = []
-    if isinstance(c, LineString):
-        points += [Point(coord) for coord in c.coords]
-    else:
-        for g in c.geoms:
-            if isinstance(g, Point):
-                points.append(g)
-            else:
-                for x in g.coords:
-                    points.append(Point(x))
-    best = None
-    best_dist = float("inf")
-    for elem in points:
-        if (dist := elem.distance(p)) < best_dist:
-            best_dist = dist
-            best = elem
-    return best
+def trace_rays(
+    bvh: SegmentBVH,
+    walls: np.ndarray,
+    origins: np.ndarray,
+    directions: np.ndarray,
+    bounces: int = 0,
+    max_lengths: Optional[np.ndarray] = None,
+) -> list[list[tuple[float, float]]]:
+    """
+    Follow rays through a scene, reflecting them off obstacle edges.
+    Args:
+        bvh: Hierarchy over every edge in the scene
+        walls: Boolean array marking the edges that absorb rays rather than reflecting them
+        origins: (m, 2) array of ray origins
+        directions: (m, 2) array of unit ray directions
+        bounces: How many times each ray may reflect
+        max_lengths: If given, each ray is cut off after traveling this far
 
+    Returns: One polyline per ray, empty if the ray travels a negligible distance
+    """
+    if max_lengths is None:
+        max_lengths = np.full(len(origins), np.inf)
+    points = [origins.copy()]
+    traveled = np.zeros(len(origins))
+    active = np.ones(len(origins), dtype=bool)
+    origins, directions = origins.copy(), directions.copy()
+    for bounce in range(bounces + 1):
+        t, hit = bvh.nearest_hits(origins, directions, 1e-9)
+        t = np.where(active, np.minimum(t, max_lengths - traveled), 0)
+        t[~np.isfinite(t)] = 0
+        origins = origins + t[:, None] * directions
+        points.append(origins.copy())
+        traveled += t
+        active &= (hit >= 0) & (traveled < max_lengths)
+        active[active] &= ~walls[hit[active]]
+        if bounce == bounces or not np.any(active):
+            break
+        # Reflect off the edge that was hit
+        edges = bvh.segments[hit[active], 1] - bvh.segments[hit[active], 0]
+        normals = np.stack((-edges[:, 1], edges[:, 0]), axis=1)
+        normals /= np.linalg.norm(normals, axis=1)[:, None]
+        d = directions[active]
+        directions[active] = d - 2 * np.sum(d * normals, axis=1)[:, None] * normals
+    points = np.stack(points, axis=1)
+    paths = []
+    for ray, length in zip(points, traveled):
+        if length < 1e-5:
+            paths.append([])
+            continue
+        # Drop the repeated points left behind once a ray has stopped
+        keep = np.concatenate(([True], np.any(np.diff(ray, axis=0) != 0, axis=1)))
+        paths.append(list(map(tuple, ray[keep].tolist())))
+    return paths
 
-def radial_drawing(
+
+def traced_drawing(
     width: float,
     height: float,
     shapes: list[Polygon],
     n_lines: int,
+    bounces: int = 0,
+    falloff: Optional[float] = None,
+    generator: Optional[np.random.Generator] = None,
 ) -> list[Drawing]:
-    boundary = LineString([(0, 0), (width, 0), (width, height), (0, height), (0, 0)])
-    drawings = []
+    """
+    Shine rays out of each emitter, letting them bounce off the other shapes.
+    Args:
+        width: Width of the page
+        height: Height of the page
+        shapes: The emitters, which are also the obstacles
+        n_lines: Rays per emitter
+        bounces: How many times each ray may reflect, 0 stops rays at the first obstacle
+        falloff: If given, rays die out at random so that line density halves every falloff * ln(2) of distance
+        generator: Source of randomness for the falloff, defaults to the module generator
+
+    Returns: One Drawing per emitter
+    """
+    if generator is None:
+        generator = rng
+    segments, owners = polygon_edges(shapes)
+    segments = np.concatenate((segments, rect_edges(width, height)))
+    owners = np.concatenate((owners, np.full(4, -1)))
+    origins, directions, emitter = [], [], []
     for i, shape in enumerate(shapes):
-        obstacles = GeometryCollection([boundary, *[x for x in shapes if x != shape]])
-        lines = []
         center = np.array(shape.centroid.coords[0])
         angle_offset = i * 2 * np.pi / n_lines / len(shapes)
-        for angle in np.linspace(
+        angles = np.linspace(
             angle_offset, 2 * np.pi + angle_offset, n_lines, endpoint=False
-        ):
-            velocity = 1000 * np.array([np.cos(angle), np.sin(angle)])
-            ray = LineString([center, center + velocity])
-            start = shape.exterior.intersection(ray)
-            end = nearest_point(start, obstacles.intersection(ray))
-            if None in (start, end) or start.distance(end) < 1e-5:
-                continue
-            try:
-                lines.append([start.coords[0], end.coords[0]])
-            except NotImplementedError:
-                print("uh oh")
-        drawings.append(Drawing(lines))
-    return drawings
+        )
+        spokes = np.stack((np.cos(angles), np.sin(angles)), axis=1)
+        # Each ray starts where it last leaves its own emitter
+        own_hits = ray_segment_distances(
+            np.broadcast_to(center, spokes.shape), spokes, segments[owners == i]
+        )
+        own_hits[~np.isfinite(own_hits)] = -np.inf
+        start = own_hits.max(axis=1, initial=-np.inf)
+        keep = np.isfinite(start)
+        origins.append(center + start[keep, None] * spokes[keep])
+        directions.append(spokes[keep])
+        emitter.append(np.full(np.sum(keep), i))
+    # Trace every emitter's rays in one batch
+    emitter = np.concatenate(emitter)
+    max_lengths = None
+    if falloff is not None:
+        max_lengths = -falloff * np.log(1 - generator.random(len(emitter)))
+    paths = trace_rays(
+        SegmentBVH(segments),
+        owners == -1,
+        np.concatenate(origins),
+        np.concatenate(directions),
+        bounces,
+        max_lengths,
+    )
+    drawings = [[] for _ in shapes]
+    for i, path in zip(emitter, paths):
+        if path:
+            drawings[i].append(path)
+    return [Drawing(paths) for paths in drawings]
+
+
+def radial_drawing(
+    width: float,
+    height: float,
+    shapes: list[Polygon],
+    n_lines: int,
+) -> list[Drawing]:
+    return traced_drawing(width, height, shapes, n_lines)
 
 
 def n_gon(n: int, x: float, y: float, r: float) -> Polygon:
@@ -125,25 +204,69 @@ def random_n_gons(
     shapes: int,
     separation: float,
     margin: float,
+    max_attempts: int = 10000,
+    generator: Optional[np.random.Generator] = None,
 ) -> list[Polygon]:
+    """
+    Scatter regular polygons over the page, keeping them at least separation apart.
+    Args:
+        width: Width of the page
+        height: Height of the page
+        min_r: Smallest circumradius of a polygon
+        max_r: Largest circumradius of a polygon
+        shapes: How many polygons to place
+        separation: Minimum distance between any two polygons
+        margin: Minimum distance between a polygon and the edge of the page
+        max_attempts: Give up after this many candidate placements, even if fewer than shapes have been placed
+        generator: Source of randomness, defaults to the module generator
+
+    Returns: The polygons that were placed
+    """
+    if generator is None:
+        generator = rng
     out: list[Polygon] = []
-    sides = rng.choice([3, 4, 6, 200], shapes, False)
-    while len(out) < shapes:
-        r = rng.uniform(min_r, max_r)
-        shape = n_gon(
-            sides[len(out)],
-            rng.uniform(margin + r, width - r - margin),
-            rng.uniform(margin + r, height - r - margin),
-            r,
+    # Uniform grid over the page; cells are large enough that only neighboring cells can conflict
+    cell_size = 2 * max_r + separation
+    index: dict[tuple[int, int], list[tuple[Polygon, np.ndarray, float, float]]] = {}
+    sides = generator.choice([3, 4, 6, 200], shapes, shapes > 4)
+    for _ in range(max_attempts):
+        if len(out) == shapes:
+            break
+        r = generator.uniform(min_r, max_r)
+        n = sides[len(out)]
+        center = np.array(
+            [
+                generator.uniform(margin + r, width - r - margin),
+                generator.uniform(margin + r, height - r - margin),
+            ]
         )
-        shape = rotate(shape, rng.uniform(0, 360), "centroid")
-        good = True
-        for other in out:
-            if other.distance(shape) < separation:
-                good = False
-                break
-        if good:
-            out.append(shape)
+        angle = generator.uniform(0, 360)
+        inner_r = r * np.cos(np.pi / n)
+        cell = (int(center[0] // cell_size), int(center[1] // cell_size))
+        neighbors = [
+            entry
+            for dx in (-1, 0, 1)
+            for dy in (-1, 0, 1)
+            for entry in index.get((cell[0] + dx, cell[1] + dy), [])
+        ]
+        # Bounding circles settle most pairs without building the polygon at all:
+        # circumcircles far enough apart are always fine, incircles too close never are
+        dists = [np.linalg.norm(center - entry[1]) for entry in neighbors]
+        if any(
+            dist < inner_r + entry[3] + separation
+            for dist, entry in zip(dists, neighbors)
+        ):
+            continue
+        shape = rotate(n_gon(n, *center, r), angle, "centroid")
+        if any(
+            dist < r + entry[2] + separation and entry[0].distance(shape) < separation
+            for dist, entry in zip(dists, neighbors)
+        ):
+            continue
+        out.append(shape)
+        index.setdefault(cell, []).append((shape, center, r, inner_r))
+    if len(out) < shapes:
+        print(f"Only {len(out)} of {shapes} emitters fit after {max_attempts} attempts")
     return out
 
 
@@ -157,6 +280,9 @@ def random_n_gons(
 @click.option("-minr", "--min_radius", prompt=True, type=float, default=0.5)
 @click.option("-maxr", "--max_radius", prompt=True, type=float, default=1.5)
 @click.option("-sep", "--separation", prompt=True, type=float, default=0.5)
+@click.option("--seed", type=int, default=None)
+@click.option("-b", "--bounces", type=int, default=0)
+@click.option("-f", "--falloff", type=float, default=None)
 def main(
     test: bool,
     width: float,
@@ -167,12 +293,25 @@ def main(
     min_radius: float,
     max_radius: float,
     separation: float,
+    seed: Optional[int],
+    bounces: int,
+    falloff: Optional[float],
 ):
     dw, dh = width - 2 * margin, height - 2 * margin
+    generator = np.random.default_rng(seed)
     emitters = random_n_gons(
-        dw, dh, min_radius, max_radius, emitters, separation, margin
+        dw,
+        dh,
+        min_radius,
+        max_radius,
+        emitters,
+        separation,
+        margin,
+        generator=generator,
+    )
+    drawings = traced_drawing(
+        dw, dh, emitters, spokes, bounces, falloff, generator=generator
     )
-    drawings = radial_drawing(dw, dh, emitters, spokes)
     drawings = [drawing.repeat().sort_paths() for drawing in drawings]
     drawings = Drawing.multi_scale_to_fit(drawings, width, height, margin)
 
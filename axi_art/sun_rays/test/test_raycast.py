@@ -0,0 +1,45 @@
+import numpy as np
+
+from axi_art.sun_rays.raycast import SegmentBVH, ray_segment_distances
+
+
+def test_ray_segment_distances():
+    segments = np.array([[(1, -1), (1, 1)], [(3, -1), (3, 1)], [(0, 2), (1, 2)]])
+    hits = ray_segment_distances(np.zeros((1, 2)), np.array([[1.0, 0.0]]), segments)
+    assert np.allclose(hits, [[1, 3, np.inf]])
+
+
+def test_bvh_matches_brute_force():
+    rng = np.random.default_rng(0)
+    starts = rng.uniform(0, 10, (500, 2))
+    segments = np.stack((starts, starts + rng.uniform(-0.5, 0.5, (500, 2))), axis=1)
+    origins = rng.uniform(0, 10, (200, 2))
+    angles = rng.uniform(0, 2 * np.pi, 200)
+    directions = np.stack((np.cos(angles), np.sin(angles)), axis=1)
+    t, idx = SegmentBVH(segments, leaf_size=8).nearest_hits(origins, directions)
+    brute = ray_segment_distances(origins, directions, segments)
+    assert np.allclose(t, brute.min(axis=1))
+    hit = np.isfinite(t)
+    assert np.all(idx[hit] == brute[hit].argmin(axis=1))
+    assert np.all(idx[~hit] == -1)
+
+
+def test_bvh_axis_aligned_rays_grazing_boxes():
+    segments = np.array([[(1, 0), (1, 1)], [(2, -1), (2, 1)]], dtype=float)
+    t, idx = SegmentBVH(segments, leaf_size=1).nearest_hits(
+        np.zeros((1, 2)), np.array([[1.0, 0.0]])
+    )
+    assert t[0] == 1 and idx[0] == 0
+    # Rays along the grid lines run exactly along the faces of the segments' boxes
+    grid = np.arange(5, dtype=float)
+    segments = np.array(
+        [[(x, y), (x + 1, y)] for x in grid for y in grid]
+        + [[(x, y), (x, y + 1)] for x in grid for y in grid]
+    )
+    origins = np.array([(-1, y) for y in grid] + [(x, -1) for x in grid], dtype=float)
+    origins = np.concatenate((origins, origins + 0.5))
+    directions = np.array([(1.0, 0.0)] * 5 + [(0.0, 1.0)] * 5)
+    directions = np.concatenate((directions, directions))
+    t, _ = SegmentBVH(segments, leaf_size=1).nearest_hits(origins, directions)
+    brute = ray_segment_distances(origins, directions, segments)
+    assert np.array_equal(t, brute.min(axis=1))
@@ -0,0 +1,61 @@
+import numpy as np
+
+from axi_art.dedup import remove_duplicates
+from axi_art.pathset import PathSet
+
+
+def test_overlapping_segments_are_merged():
+    paths = PathSet.from_paths(
+        [[(0, 0), (2, 0), (2, 1)], [(3, 0), (1, 0)], [(5, 5), (6, 6), (7, 5)]]
+    )
+    deduped, saved = remove_duplicates(paths)
+    assert np.isclose(saved, 1)
+    assert sorted(map(sorted, deduped.paths)) == [
+        [(0.0, 0.0), (3.0, 0.0)],
+        [(2.0, 0.0), (2.0, 1.0)],
+        [(5.0, 5.0), (6.0, 6.0), (7.0, 5.0)],
+    ]
+
+
+def test_shared_tile_edges_are_drawn_once():
+    squares = [
+        [(i, j), (i + 1, j), (i + 1, j + 1), (i, j + 1), (i, j)]
+        for i in range(4)
+        for j in range(4)
+    ]
+    # Rotated so the edges aren't axis aligned and the coordinates aren't exact
+    paths = PathSet.from_paths(squares).rotate_radians(np.pi / 2 - 1e-12)
+    deduped, saved = remove_duplicates(paths)
+    assert np.isclose(saved, 4 * 16 - 2 * 4 * 5)
+    drawn = sum(np.linalg.norm(np.diff(path, axis=0), axis=1).sum() for path in deduped)
+    assert np.isclose(drawn, 2 * 4 * 5)
+
+
+def test_touching_segments_are_kept():
+    paths = PathSet.from_paths([[(0, 0), (1, 0)], [(1, 0), (2, 0)]])
+    deduped, saved = remove_duplicates(paths)
+    assert saved == 0
+    assert deduped.paths == paths.paths
+
+
+def test_fine_fan_is_not_chained_together():
+    # Neighbouring spokes are within tolerance of each other, the whole fan is far from it
+    angles = np.arange(2000) * 5e-7
+    tips = np.stack((np.cos(angles), np.sin(angles)), axis=1)
+    paths = PathSet.from_paths([[(0, 0), tuple(tip)] for tip in tips])
+    deduped, _ = remove_duplicates(paths, 1e-6, 1e-6)
+    assert len(deduped) > 500
+    # Every spoke's tip is still drawn, up to the tolerances
+    ends = np.array([path[np.argmax(np.linalg.norm(path, axis=1))] for path in deduped])
+    nearest = np.linalg.norm(tips[:, None] - ends[None], axis=2).min(axis=1)
+    assert nearest.max() <= 2e-6
+
+
+def test_empty_input():
+    for paths in ([], [[]], [[], []]):
+        deduped, saved = remove_duplicates(PathSet.from_paths(paths))
+        assert deduped.paths == paths and saved == 0
+    deduped, saved = remove_duplicates(
+        PathSet.from_paths([[], [(0, 0), (1, 0)], [(1, 0), (0, 0)], []])
+    )
+    assert deduped.paths == [[(0.0, 0.0), (1.0, 0.0)]] and saved == 1
@@ -0,0 +1,16 @@
+import numpy as np
+
+from axi_art.path_order import order_paths, pen_up_distance
+from axi_art.pathset import PathSet
+
+
+def test_order_paths_reverses_and_keeps_paths():
+    # A row of segments, every other one pointing backwards and all shuffled
+    paths = [[(i, 0), (i + 0.5, 0)] for i in range(20)]
+    paths = [path[::-1] if i % 2 else path for i, path in enumerate(paths)]
+    shuffled = PathSet.from_paths(
+        [paths[i] for i in np.random.default_rng(0).permutation(20)]
+    )
+    ordered = order_paths(shuffled, time_budget=0.5)
+    assert np.isclose(pen_up_distance(ordered), 19 * 0.5)
+    assert sorted(map(sorted, ordered.paths)) == sorted(map(sorted, paths))
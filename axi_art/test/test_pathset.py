@@ -0,0 +1,33 @@
+import numpy as np
+
+from axi_art.pathset import PathSet
+
+PATHS = [[(0, 0), (1, 0)], [(1, 1), (2, 1), (2, 2)], [(3, 3), (4, 4)]]
+
+
+def test_round_trip_and_slicing():
+    paths = PathSet.from_paths(PATHS)
+    assert len(paths) == 3
+    assert paths.paths == PATHS
+    assert np.all(paths[-1] == PATHS[-1])
+    middle = paths[1:]
+    assert np.shares_memory(middle.coords, paths.coords)
+    assert middle.paths == PATHS[1:]
+    assert paths[::2].paths == PATHS[::2]
+    assert paths[3:].paths == []
+
+
+def test_transforms():
+    paths = PathSet.from_paths(PATHS)
+    assert paths.bounds == (0, 0, 4, 4)
+    assert paths.translate(1, -1).bounds == (1, -1, 5, 3)
+    assert paths.scale(2, 3).size == (8, 12)
+    rotated = paths.rotate_radians(np.pi / 2, (1, 1))
+    assert np.allclose(rotated[0], [(2, 0), (2, 1)])
+    assert np.allclose(PathSet.concatenate([paths, rotated])[3], rotated[0])
+
+
+def test_default_offsets():
+    assert len(PathSet()) == 0
+    single = PathSet(np.array(PATHS[1]))
+    assert single.paths == [PATHS[1]]
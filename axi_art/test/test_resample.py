@@ -0,0 +1,50 @@
+import numpy as np
+
+from axi_art.pathset import PathSet
+from axi_art.resample import _segment_distances, adaptive_resample, simplify
+
+
+def _furthest(original: PathSet, resampled: PathSet) -> float:
+    # Furthest any original point is from the resampled path
+    furthest = 0
+    for path, kept in zip(original, resampled):
+        distances = [
+            _segment_distances(
+                path, np.repeat(a[None], len(path), 0), np.repeat(b[None], len(path), 0)
+            )
+            for a, b in zip(kept[:-1], kept[1:])
+        ]
+        furthest = max(furthest, np.min(distances, axis=0).max())
+    return furthest
+
+
+def test_simplify_keeps_corners_and_drops_collinear_points():
+    paths = PathSet.from_paths(
+        [[(0, 0), (0.5, 0), (1, 0), (1, 1), (0, 1), (0, 0)], [(2, 2)], [(3, 3), (4, 4)]]
+    )
+    assert simplify(paths, 0.01).paths == [
+        [(0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0), (0.0, 0.0)],
+        [(2.0, 2.0)],
+        [(3.0, 3.0), (4.0, 4.0)],
+    ]
+
+
+def test_simplify_bounds_deviation():
+    x = np.linspace(0, 10, 2000)
+    paths = PathSet.from_paths(
+        [np.stack((x, np.sin(x * k)), axis=1) for k in (1, 2, 3)]
+    )
+    simplified = simplify(paths, 0.01)
+    assert len(simplified.coords) < len(paths.coords) / 5
+    assert _furthest(paths, simplified) <= 0.01
+
+
+def test_adaptive_resample_follows_curvature():
+    theta = np.linspace(0, 2 * np.pi, 2000)
+    small = np.stack((np.cos(theta), np.sin(theta)), axis=1)
+    paths = PathSet.from_paths([small, 10 * small])
+    resampled = adaptive_resample(paths, 0.01)
+    # Chords on a circle of radius r are about sqrt(8 * r * tolerance) long
+    assert abs(resampled.lengths[0] - 2 * np.pi / np.sqrt(0.08)) < 3
+    assert abs(resampled.lengths[1] - 20 * np.pi / np.sqrt(0.8)) < 3
+    assert _furthest(paths, resampled) < 0.02
@@ -0,0 +1,19 @@
+import numpy as np
+
+from axi_art.ridge_lines import occlude, ridge_lines
+
+
+def test_occlude_clips_at_crossings():
+    back = [(0, 0), (1, 2), (2, 0)]
+    front = [(0, 1), (1, 1), (2, 1)]
+    visible = occlude([back, front])
+    assert np.allclose(visible[0], [(0, 0), (0.5, 1)])
+    assert np.allclose(visible[1], [(1.5, 1), (2, 0)])
+    assert visible[2] == front
+
+
+def test_ridge_lines_flat_field():
+    paths = ridge_lines(np.zeros((4, 5)), 2, 5, 10, 4, 1)
+    assert np.allclose(
+        paths, [[(x, 0) for x in range(0, 10, 2)], [(x, 2) for x in range(0, 10, 2)]]
+    )
@@ -0,0 +1,20 @@
+import numpy as np
+
+from axi_art.sampling import bicubic, bilinear, nearest
+
+
+def test_samplers_interpolate_and_clamp():
+    pixels = np.array([[0, 10], [20, 30]], dtype=np.uint8)
+    x = np.array([0.75, -3, 5])
+    y = np.array([0.25, 0, 1])
+    assert np.allclose(bilinear(pixels, x, y), [12.5, 0, 30])
+    assert np.allclose(nearest(pixels, x, y), [10, 0, 30])
+    assert np.allclose(bicubic(pixels, x, y)[1:], [0, 30])
+
+
+def test_samplers_keep_channels():
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 256, (6, 8, 3))
+    y, x = np.mgrid[0:6, 0:8]
+    for sampler in (nearest, bilinear, bicubic):
+        assert np.allclose(sampler(pixels, x, y), pixels)
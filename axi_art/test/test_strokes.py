@@ -0,0 +1,40 @@
+from axi_art.pathset import PathSet
+from axi_art.strokes import assemble_strokes, snap_points
+
+
+def _segments(paths):
+    return sorted(
+        tuple(sorted((tuple(a), tuple(b))))
+        for path in paths
+        for a, b in zip(path[:-1].tolist(), path[1:].tolist())
+    )
+
+
+def test_square_becomes_one_closed_stroke():
+    square = [[(0, 0), (1, 0)], [(1, 1), (1, 0)], [(0, 1), (1, 1)], [(0, 0), (0, 1)]]
+    strokes = assemble_strokes(PathSet.from_paths(square))
+    assert len(strokes) == 1
+    assert (strokes[0][0] == strokes[0][-1]).all()
+    assert _segments(strokes) == _segments(PathSet.from_paths(square))
+
+
+def test_plus_needs_two_strokes():
+    plus = [[(0, 0), (1, 0)], [(0, 0), (-1, 0)], [(0, 0), (0, 1)], [(0, 0), (0, -1)]]
+    strokes = assemble_strokes(PathSet.from_paths(plus))
+    assert len(strokes) == 2
+    assert _segments(strokes) == _segments(PathSet.from_paths(plus))
+
+
+def test_short_edges_are_retraced():
+    # A T has two odd ends joined through its short stem, retracing the stem gives one stroke
+    tee = [[(-1, 0), (0, 0)], [(0, 0), (1, 0)], [(0, 0), (0, 0.1)]]
+    assert len(assemble_strokes(PathSet.from_paths(tee))) == 2
+    assert len(assemble_strokes(PathSet.from_paths(tee), max_duplicate=0.5)) == 1
+
+
+def test_snap_points():
+    labels, vertices = snap_points(
+        PathSet.from_paths([[(0, 0), (0.001, 0), (1, 1), (1, 1.0005)]]).coords, 0.01
+    )
+    assert labels.tolist() == [0, 0, 1, 1]
+    assert len(vertices) == 2
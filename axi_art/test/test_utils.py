@@ -0,0 +1,36 @@
+import axi
+import numpy as np
+
+from axi_art.utils import Font, break_lines
+
+# A tiny Hershey-style font: (left, right, paths) for each character from " " on
+FONT = [(-2, 2, [])] + [
+    (-1 - i % 3, 2 + i % 4, [[(-1, -i % 5), (1, 3)], [(0, 0), (i % 2, 4)]])
+    for i in range(1, 96)
+]
+
+
+def test_font_matches_axi_text():
+    font = Font(FONT, 12)
+    for text in ["Hello world", "a  b", "~"]:
+        expected = axi.Drawing(axi.text(text, FONT)).scale(font.scale)
+        assert np.allclose(font.measure(text), expected.size)
+        assert all(
+            np.allclose(a, b) for a, b in zip(font.text(text).paths, expected.paths)
+        )
+    justified = axi.Drawing(axi.text("a b c", FONT, extra=3)).scale(font.scale)
+    assert np.allclose(font.text("a b c", extra=3).paths, justified.paths)
+
+
+def test_break_lines():
+    # Words 3, 2, 2 and 5 wide with a space of 1 between them
+    lefts = np.array([0, 4, 7, 10])
+    rights = np.array([3, 6, 9, 15])
+    assert break_lines(lefts, rights, 6) == [(0, 2), (2, 3), (3, 4)]
+    assert break_lines(lefts, rights, 6, balanced=True) == [(0, 1), (1, 3), (3, 4)]
+    assert break_lines(lefts, rights, 2) == [(0, 1), (1, 2), (2, 3), (3, 4)]
+
+
+def test_word_wrap_keeps_whitespace_only_lines():
+    font = Font(FONT, 12)
+    assert font.word_wrap("a b\n \nc\n\nd", 1000) == ["a b", "", "c", "d"]
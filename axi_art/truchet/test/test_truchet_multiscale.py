@@ -0,0 +1,40 @@
+import numpy as np
+
+from axi_art.truchet.truchet_multiscale import (
+    Grid,
+    clip_arc_outside_circle,
+    clip_segment_outside_rect,
+    make_grid,
+)
+
+
+def test_free_placements():
+    grid = Grid(4, 3)
+    grid.grid[1, 1] = 1
+    target = np.array([[False, False, True], [False, False, True]])
+    assert np.all(grid.free_placements(2) == target)
+
+
+def test_make_grid_tiles_every_cell_once():
+    np.random.seed(0)
+    grid = make_grid(30, 20, 5)
+    coverage = np.zeros((20, 30), dtype=int)
+    for box in grid.boxes:
+        coverage[box.r : box.r + box.size, box.c : box.c + box.size] += 1
+    assert np.all(coverage == 1)
+
+
+def test_clip_arc_outside_circle_ends_on_mask():
+    pieces = clip_arc_outside_circle(3, 3, 2, np.pi, 3 * np.pi / 2, 0, 0, 2.5)
+    assert len(pieces) == 2
+    for start, end in pieces:
+        for angle in (start, end):
+            if angle not in (np.pi, 3 * np.pi / 2):
+                point = (3 + 2 * np.cos(angle), 3 + 2 * np.sin(angle))
+                assert np.isclose(np.hypot(*point), 2.5)
+
+
+def test_clip_segment_outside_rect():
+    pieces = clip_segment_outside_rect((1, 0), (1, 4), (0, 1, 4, 3))
+    assert pieces == [[(1, 0), (1, 1)], [(1, 3), (1, 4)]]
+    assert clip_segment_outside_rect((0, 5), (4, 5), (0, 1, 4, 3)) == [[(0, 5), (4, 5)]]
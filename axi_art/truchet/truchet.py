@@ -1,7 +1,11 @@
 import axi
 import random
+from functools import lru_cache
+
 import numpy as np
 
+from axi_art.pathset import PathSet
+
 
 def horizontal_lines():
     paths = []
@@ -115,20 +119,24 @@ def edge_circles(samples_per_circle=32):
     return axi.Drawing(paths)
 
 
+@lru_cache(maxsize=None)
+def tile_prototype(tile, rotation: float) -> PathSet:
+    drawing = tile().translate(-0.5, -0.5).rotate(rotation * 2 * np.pi)
+    return PathSet.from_drawing(drawing)
+
+
 def truchet_tiles(rows, cols):
     tiles = (
         [corner_circles, horizontal_lines, edge_circles, chevrons, diagonal_lines],
         [1, 0, 0, 0, 0],
     )
-    out = axi.Drawing()
+    placed = []
     for x in range(cols):
         for y in range(rows):
-            tile = random.choices(tiles[0], weights=tiles[1])[0]()
-            tile = tile.translate(-0.5, -0.5)
-            tile = tile.rotate(random.choice([0, 0.25, 0.5, 0.75]) * 2 * np.pi)
-            tile = tile.translate(x, y)
-            out.add(tile)
-    return out
+            tile = random.choices(tiles[0], weights=tiles[1])[0]
+            prototype = tile_prototype(tile, random.choice([0, 0.25, 0.5, 0.75]))
+            placed.append(prototype.translate(x, y))
+    return PathSet.concatenate(placed).to_drawing()
 
 
 TEST = False
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from random import choice
 from typing import NamedTuple
 
@@ -6,7 +7,9 @@ import click
 import numpy as np
 from axi import Drawing
 from axi.paths import Path
-from shapely.geometry import MultiLineString, Polygon, LineString
+
+from axi_art.dedup import dedup_drawing
+from axi_art.pathset import PathSet
 
 
 class Box(NamedTuple):
@@ -19,6 +22,7 @@ class Grid:
     def __init__(self, width: int, height: int):
         self.grid = np.zeros((height, width))
         self._boxes = []
+        self._legal: dict[int, np.ndarray] = {}
 
     @property
     def width(self) -> int:
@@ -34,133 +38,258 @@ class Grid:
         singletons = np.where(self.grid == 0)
         return out + [Box(*coord, 1) for coord in zip(*singletons)]
 
-    def randomly_merge(self, size: int) -> bool:
-        legal_placements = [
-            (r, c)
-            for r in range(self.height - size + 1)
-            for c in range(self.width - size + 1)
-        ]
-        legal_placements = list(
-            filter(
-                lambda x: np.all(
-                    self.grid[x[0] : x[0] + size, x[1] : x[1] + size] == 0
-                ),
-                legal_placements,
-            )
+    def free_placements(self, size: int) -> np.ndarray:
+        """
+        Find every position where a size x size box fits without overlapping an existing box.
+        Args:
+            size: The side length of the box to place
+
+        Returns: A boolean array where [r, c] is True if a box can have its upper-left corner at (r, c)
+        """
+        if size > self.height or size > self.width:
+            return np.zeros((0, 0), dtype=bool)
+        # Summed-area table of occupied cells, padded so that window sums need no special cases
+        occupied = np.zeros((self.height + 1, self.width + 1), dtype=int)
+        occupied[1:, 1:] = np.cumsum(np.cumsum(self.grid != 0, axis=0), axis=1)
+        window = (
+            occupied[size:, size:]
+            - occupied[:-size, size:]
+            - occupied[size:, :-size]
+            + occupied[:-size, :-size]
         )
+        return window == 0
+
+    def randomly_merge(self, size: int) -> bool:
+        if size not in self._legal:
+            self._legal[size] = self.free_placements(size)
+        legal_placements = np.flatnonzero(self._legal[size])
         if len(legal_placements) == 0:
             return False
-        coord = choice(legal_placements)
-        self.grid[coord[0] : coord[0] + size, coord[1] : coord[1] + size] = 1
-        self._boxes.append(Box(coord[0], coord[1], size))
+        r, c = divmod(int(choice(legal_placements)), self._legal[size].shape[1])
+        self.grid[r : r + size, c : c + size] = 1
+        self._boxes.append(Box(r, c, size))
+        # Any cached placement whose box would overlap the new one is no longer legal
+        for k, legal in self._legal.items():
+            legal[max(0, r - k + 1) : r + size, max(0, c - k + 1) : c + size] = False
         return True
 
 
 def render(grid: Grid, p_turn: float) -> list[Drawing]:
-    out = Drawing()
-    highlights = Drawing()
+    tiles, highlights = [], []
     for box in grid.boxes:
-        if np.random.random() < p_turn:
-            tile = truchet_corner_circles(box.size, 2 * box.size)
-            highlight = truchet_corner_circle_highlights(box.size, 2 * box.size)
-        else:
-            tile = truchet_crossed_lines(box.size, 2 * box.size)
-            highlight = truchet_crossed_lines_highlights(box.size, 2 * box.size)
-        tile = tile.translate(-box.size / 2, -box.size / 2)
-        angle = np.random.choice([0, np.pi / 2, np.pi, 3 * np.pi / 2])
-        tile = tile.rotate(angle)
-        tile = tile.translate(box.c + box.size / 2, box.r + box.size / 2)
-        out.add(tile)
-        highlight = highlight.translate(-box.size / 2, -box.size / 2)
-        highlight = highlight.rotate(angle)
-        highlight = highlight.translate(box.c + box.size / 2, box.r + box.size / 2)
-        highlights.add(highlight)
-    return [out, highlights]
-
-
-def arc(x: float, y: float, r: float, start_angle=0, end_angle=2 * np.pi) -> Path:
+        kind = "corner_circles" if np.random.random() < p_turn else "crossed_lines"
+        tile, highlight = tile_prototype(kind, int(box.size), np.random.randint(4))
+        center = (box.c + box.size / 2, box.r + box.size / 2)
+        tiles.append(tile.translate(*center))
+        highlights.append(highlight.translate(*center))
+    return [
+        PathSet.concatenate(tiles).to_drawing(),
+        PathSet.concatenate(highlights).to_drawing(),
+    ]
+
+
+ARC_TOLERANCE = 0.002
+
+
+def arc(
+    x: float,
+    y: float,
+    r: float,
+    start_angle=0,
+    end_angle=2 * np.pi,
+    tolerance: float = ARC_TOLERANCE,
+) -> Path:
+    # Use just enough samples that no chord strays more than tolerance from the true arc
+    max_step = 2 * np.arccos(max(-1.0, 1 - tolerance / r)) if r > 0 else np.pi
+    samples = max(2, int(np.ceil(abs(end_angle - start_angle) / max_step)) + 1)
     return [
         (x + r * np.cos(theta), y + r * np.sin(theta))
-        for theta in np.linspace(start_angle, end_angle, 32)
+        for theta in np.linspace(start_angle, end_angle, samples)
     ]
 
 
+def subtract_intervals(
+    intervals: list[tuple[float, float]], remove: list[tuple[float, float]]
+) -> list[tuple[float, float]]:
+    for lo, hi in remove:
+        intervals = [
+            piece
+            for a, b in intervals
+            for piece in ((a, min(b, lo)), (max(a, hi), b))
+            if piece[1] - piece[0] > 1e-12
+        ]
+    return intervals
+
+
+def clip_arc_outside_circle(
+    x: float,
+    y: float,
+    r: float,
+    start_angle: float,
+    end_angle: float,
+    cx: float,
+    cy: float,
+    cr: float,
+) -> list[tuple[float, float]]:
+    """
+    Find the parts of an arc that lie outside of a circle.
+    Args:
+        x: The x coordinate of the center of the arc
+        y: The y coordinate of the center of the arc
+        r: The radius of the arc
+        start_angle: The angle the arc starts at
+        end_angle: The angle the arc ends at, greater than start_angle
+        cx: The x coordinate of the center of the clipping circle
+        cy: The y coordinate of the center of the clipping circle
+        cr: The radius of the clipping circle
+
+    Returns: The (start, end) angles of each piece of the arc outside the clipping circle
+    """
+    d = np.hypot(cx - x, cy - y)
+    if d + r <= cr:
+        return []
+    if d >= r + cr or d + cr <= r:
+        return [(start_angle, end_angle)]
+    # The two circles cross at the angles center +- half_width
+    center = np.arctan2(cy - y, cx - x)
+    half_width = np.arccos((r**2 + d**2 - cr**2) / (2 * r * d))
+    inside_start = (center - half_width - start_angle) % (2 * np.pi)
+    pieces = subtract_intervals(
+        [(0, end_angle - start_angle)],
+        [
+            (inside_start, inside_start + 2 * half_width),
+            (inside_start - 2 * np.pi, inside_start + 2 * half_width - 2 * np.pi),
+        ],
+    )
+    return [(start_angle + a, start_angle + b) for a, b in pieces]
+
+
+def clip_segment_outside_rect(
+    start: tuple[float, float],
+    end: tuple[float, float],
+    rect: tuple[float, float, float, float],
+) -> list[Path]:
+    """
+    Find the parts of a line segment that lie outside of an axis-aligned rectangle.
+    Args:
+        start: The first endpoint of the segment
+        end: The second endpoint of the segment
+        rect: The (min_x, min_y, max_x, max_y) bounds of the clipping rectangle
+
+    Returns: The pieces of the segment outside the rectangle
+    """
+    (x0, y0), (x1, y1) = start, end
+    dx, dy = x1 - x0, y1 - y0
+    # Liang-Barsky: narrow down the parameter range in which the segment is inside the rectangle
+    t_in, t_out = 0.0, 1.0
+    for p, q in (
+        (-dx, x0 - rect[0]),
+        (dx, rect[2] - x0),
+        (-dy, y0 - rect[1]),
+        (dy, rect[3] - y0),
+    ):
+        if p == 0:
+            if q < 0:
+                t_in, t_out = 1.0, 0.0
+        elif p < 0:
+            t_in = max(t_in, q / p)
+        else:
+            t_out = min(t_out, q / p)
+    pieces = subtract_intervals([(0.0, 1.0)], [(t_in, t_out)] if t_in < t_out else [])
+    return [[(x0 + a * dx, y0 + a * dy), (x0 + b * dx, y0 + b * dy)] for a, b in pieces]
+
+
 def truchet_corner_circles(size: float, n_circles: int) -> Drawing:
     paths = []
     r = np.linspace(size / (n_circles * 2), size - size / (n_circles * 2), n_circles)
-    circle_mask = Polygon(arc(0, 0, size - size / (n_circles * 2)))
+    mask_radius = size - size / (n_circles * 2)
     for i in range(n_circles):
         paths.append(arc(0, 0, r[i], 0, np.pi / 2))
-        under_arc = arc(size, size, r[i], np.pi, 3 * np.pi / 2)
-        shapely_under_arc = LineString(under_arc)
-        diffed = shapely_under_arc.difference(circle_mask)
-        if isinstance(diffed, LineString):
-            paths.append(diffed.coords)
-        elif isinstance(diffed, MultiLineString):
-            paths.extend([line.coords for line in diffed.geoms])
+        for start, end in clip_arc_outside_circle(
+            size, size, r[i], np.pi, 3 * np.pi / 2, 0, 0, mask_radius
+        ):
+            paths.append(arc(size, size, r[i], start, end))
     return Drawing(paths)
 
 
 def truchet_corner_circle_highlights(size: float, n_circles: int) -> Drawing:
     paths = []
     r = np.linspace(size / n_circles, size, n_circles)
-    circle_mask = Polygon(arc(0, 0, size - size / (n_circles * 2)))
+    mask_radius = size - size / (n_circles * 2)
     for i in range(0, n_circles - 1, 2):
         paths.append(arc(0, 0, r[i], 0, np.pi / 2))
-        under_arc = arc(size, size, r[i], np.pi, 3 * np.pi / 2)
-        shapely_under_arc = LineString(under_arc)
-        diffed = shapely_under_arc.difference(circle_mask)
-        if isinstance(diffed, LineString):
-            paths.append(diffed.coords)
-        elif isinstance(diffed, MultiLineString):
-            paths.extend([line.coords for line in diffed.geoms])
+        for start, end in clip_arc_outside_circle(
+            size, size, r[i], np.pi, 3 * np.pi / 2, 0, 0, mask_radius
+        ):
+            paths.append(arc(size, size, r[i], start, end))
     return Drawing(paths)
 
 
 def truchet_crossed_lines(size: float, n_lines: int) -> Drawing:
     paths = []
     positions = np.linspace(size / (n_lines * 2), size - size / (n_lines * 2), n_lines)
-    horizontal_rect_mask = Polygon(
-        [
-            (0, size / (n_lines * 2)),
-            (size, size / (n_lines * 2)),
-            (size, size - size / (n_lines * 2)),
-            (0, size - size / (n_lines * 2)),
-        ]
+    horizontal_rect_mask = (
+        0,
+        size / (n_lines * 2),
+        size,
+        size - size / (n_lines * 2),
     )
     for i in range(n_lines):
         paths.append([(0, positions[i]), (size, positions[i])])
-        line_to_cut = LineString([(positions[i], 0), (positions[i], size)])
-        diffed = line_to_cut.difference(horizontal_rect_mask)
-        if isinstance(diffed, LineString):
-            paths.append(diffed.coords)
-        elif isinstance(diffed, MultiLineString):
-            paths.extend([line.coords for line in diffed.geoms])
+        paths.extend(
+            clip_segment_outside_rect(
+                (positions[i], 0), (positions[i], size), horizontal_rect_mask
+            )
+        )
     return Drawing(paths)
 
 
 def truchet_crossed_lines_highlights(size: float, n_lines: int) -> Drawing:
     paths = []
     positions = np.linspace(size / n_lines, size, n_lines)
-    horizontal_rect_mask = Polygon(
-        [
-            (0, size / (n_lines * 2)),
-            (size, size / (n_lines * 2)),
-            (size, size - size / (n_lines * 2)),
-            (0, size - size / (n_lines * 2)),
-        ]
+    horizontal_rect_mask = (
+        0,
+        size / (n_lines * 2),
+        size,
+        size - size / (n_lines * 2),
     )
     for i in range(0, n_lines - 1, 2):
         paths.append([(0, positions[i]), (size, positions[i])])
-        line_to_cut = LineString([(positions[i], 0), (positions[i], size)])
-        diffed = line_to_cut.difference(horizontal_rect_mask)
-        if isinstance(diffed, LineString):
-            paths.append(diffed.coords)
-        elif isinstance(diffed, MultiLineString):
-            paths.extend([line.coords for line in diffed.geoms])
+        paths.extend(
+            clip_segment_outside_rect(
+                (positions[i], 0), (positions[i], size), horizontal_rect_mask
+            )
+        )
     return Drawing(paths)
 
 
+TILE_BUILDERS = {
+    "corner_circles": (truchet_corner_circles, truchet_corner_circle_highlights),
+    "crossed_lines": (truchet_crossed_lines, truchet_crossed_lines_highlights),
+}
+
+
+@lru_cache(maxsize=None)
+def tile_prototype(kind: str, size: int, rotation: int) -> tuple[PathSet, PathSet]:
+    """
+    Build a tile and its highlight once, centered on the origin, and keep them as PathSets.
+    Args:
+        kind: A key of TILE_BUILDERS
+        size: The side length of the box the tile fills
+        rotation: Number of quarter turns to rotate the tile by
+
+    Returns: The tile and its highlight
+    """
+    return tuple(
+        PathSet.from_drawing(
+            builder(size, 2 * size)
+            .translate(-size / 2, -size / 2)
+            .rotate(rotation * np.pi / 2)
+        )
+        for builder in TILE_BUILDERS[kind]
+    )
+
+
 def make_grid(width: int, height: int, max_block_size: int):
     grid = Grid(width, height)
     available_sizes = list(range(2, max_block_size + 1))
@@ -191,7 +320,10 @@ def main(
     grid = make_grid(rows, round(rows * height / width), max_block_size)
     layers = render(grid, prob_turn)
     layers = Drawing.multi_scale_to_fit(list(layers), width, height, padding=margin)
-    layers = [layer.join_paths(0.05).sort_paths() for layer in layers]
+    layers = [
+        dedup_drawing(layer, 1e-4, verbose=True).join_paths(0.05).sort_paths()
+        for layer in layers
+    ]
     if test or axi.device.find_port() is None:
         im = Drawing.render_layers(layers, bounds=(0, 0, width, height))
         im.write_to_png("truchet.png")
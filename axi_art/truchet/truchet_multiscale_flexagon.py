@@ -1,9 +1,14 @@
+import random
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import repeat
+from typing import Iterable, Optional
+
 import axi
 import click
 import numpy as np
 from axi import Drawing
 
-from axi_art.truchet.truchet_multiscale import make_grid
+from axi_art.truchet.truchet_multiscale import make_grid, render
 
 facemap = {
     (0, 0): 0,
@@ -23,24 +28,68 @@ facemap = {
 face_colors = [(0, 1), (1, 2), (2, 0), (1, 0), (2, 1), (0, 2)]
 
 
-def flexagon(
-    rows: int, cols: int, max_block_size: int, prob_turn: float, front: bool
+def make_face(
+    rows: int, cols: int, max_block_size: int, prob_turn: float, seed: int
+) -> list[Drawing]:
+    # Grid placement draws from the random module and rendering from numpy, so seed both
+    random.seed(seed)
+    np.random.seed(seed)
+    return render(make_grid(rows, cols, max_block_size), prob_turn)
+
+
+def assemble_faces(
+    faces: Iterable[list[Drawing]], rows: int, cols: int, front: bool
 ) -> list[Drawing]:
     layers = [Drawing() for _ in range(3)]
-    for r in range(4):
-        for c in range(4):
-            if (r, c) not in facemap:
-                continue
-            cell_layers = [
-                layer.translate(c * cols, r * rows)
-                for layer in make_grid(rows, cols, max_block_size).render(prob_turn)
-            ]
-            colors = face_colors[facemap[(r, c)] + (0 if front else 3)]
-            layers[colors[0]].add(cell_layers[0])
-            layers[colors[1]].add(cell_layers[1])
+    for (r, c), face in zip(facemap, faces):
+        cell_layers = [layer.translate(c * cols, r * rows) for layer in face]
+        colors = face_colors[facemap[(r, c)] + (0 if front else 3)]
+        layers[colors[0]].add(cell_layers[0])
+        layers[colors[1]].add(cell_layers[1])
     return layers
 
 
+def flexagon_sides(
+    rows: int,
+    cols: int,
+    max_block_size: int,
+    prob_turn: float,
+    seed: Optional[int] = None,
+    pool: Optional[Executor] = None,
+) -> tuple[list[Drawing], list[Drawing]]:
+    """
+    Generate the front and back of a flexagon, one independently seeded grid per face.
+    Args:
+        rows: Rows in each face
+        cols: Columns in each face
+        max_block_size: The largest block size to merge cells into
+        prob_turn: The probability of a tile being a corner circle tile
+        seed: Seeds every face, so that a sheet pair can be regenerated exactly
+        pool: If given, faces are generated in parallel on this executor
+
+    Returns: The three pen layers of the front and of the back
+    """
+    face_seeds = np.random.SeedSequence(seed).generate_state(2 * len(facemap))
+    map_func = map if pool is None else pool.map
+    faces = list(
+        map_func(
+            make_face,
+            repeat(rows),
+            repeat(cols),
+            repeat(max_block_size),
+            repeat(prob_turn),
+            face_seeds.tolist(),
+        )
+    )
+    front = assemble_faces(faces[: len(facemap)], rows, cols, True)
+    back = assemble_faces(faces[len(facemap) :], rows, cols, False)
+    return front, back
+
+
+def optimize_layer(layer: Drawing) -> Drawing:
+    return layer.join_paths(0.05).sort_paths()
+
+
 @click.command()
 @click.option("-t", "--test", is_flag=True)
 @click.option("-w", "--width", prompt=True, type=float)
@@ -49,6 +98,8 @@ def flexagon(
 @click.option("-r", "--rows", prompt=True, type=int)
 @click.option("-b", "--max-block-size", prompt=True, type=int)
 @click.option("-p", "--prob_turn", prompt=True, type=float)
+@click.option("-s", "--seed", type=int, default=None)
+@click.option("-j", "--workers", type=int, default=None)
 def main(
     test: bool,
     width: float,
@@ -57,17 +108,20 @@ def main(
     rows: int,
     max_block_size: int,
     prob_turn: float,
+    seed: Optional[int],
+    workers: Optional[int],
 ):
-    front = flexagon(
-        rows, round(rows * height / width), max_block_size, prob_turn, True
-    )
-    front = Drawing.multi_scale_to_fit(list(front), width, height, padding=margin)
-    front = [layer.join_paths(0.05).sort_paths() for layer in front]
-    back = flexagon(
-        rows, round(rows * height / width), max_block_size, prob_turn, False
-    )
-    back = Drawing.multi_scale_to_fit(list(back), width, height, padding=margin)
-    back = [layer.join_paths(0.05).sort_paths() for layer in back]
+    if seed is None:
+        seed = np.random.randint(0, 2**31)
+    print(f"seed: {seed}")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        front, back = flexagon_sides(
+            rows, round(rows * height / width), max_block_size, prob_turn, seed, pool
+        )
+        front = Drawing.multi_scale_to_fit(list(front), width, height, padding=margin)
+        back = Drawing.multi_scale_to_fit(list(back), width, height, padding=margin)
+        layers = list(pool.map(optimize_layer, front + back))
+    front, back = layers[: len(front)], layers[len(front) :]
     if test or axi.device.find_port() is None:
         im = Drawing.render_layers(front, bounds=(0, 0, width, height))
         im.write_to_png("truchet_flex_front.png")
@@ -3,36 +3,20 @@ import click
 import numpy as np
 from axi import Drawing
 
-from axi_art.truchet.truchet_multiscale import (
-    truchet_corner_circles,
-    truchet_corner_circle_highlights,
-    truchet_crossed_lines,
-    truchet_crossed_lines_highlights,
-    Grid,
-    make_grid,
-)
+from axi_art.pathset import PathSet
+from axi_art.truchet.truchet_multiscale import Grid, make_grid, tile_prototype
 
 
 def render_random_colors(grid: Grid, p_turn: float, colors: int) -> list[Drawing]:
-    layers = [Drawing() for _ in range(colors)]
+    layers = [[] for _ in range(colors)]
     for box in grid.boxes:
-        if np.random.random() < p_turn:
-            tile = truchet_corner_circles(box.size, 2 * box.size)
-            highlight = truchet_corner_circle_highlights(box.size, 2 * box.size)
-        else:
-            tile = truchet_crossed_lines(box.size, 2 * box.size)
-            highlight = truchet_crossed_lines_highlights(box.size, 2 * box.size)
-        curr_layers = np.random.choice(layers, size=2, replace=False)
-        tile = tile.translate(-box.size / 2, -box.size / 2)
-        angle = np.random.choice([0, np.pi / 2, np.pi, 3 * np.pi / 2])
-        tile = tile.rotate(angle)
-        tile = tile.translate(box.c + box.size / 2, box.r + box.size / 2)
-        curr_layers[0].add(tile)
-        highlight = highlight.translate(-box.size / 2, -box.size / 2)
-        highlight = highlight.rotate(angle)
-        highlight = highlight.translate(box.c + box.size / 2, box.r + box.size / 2)
-        curr_layers[1].add(highlight)
-    return layers
+        kind = "corner_circles" if np.random.random() < p_turn else "crossed_lines"
+        tile, highlight = tile_prototype(kind, int(box.size), np.random.randint(4))
+        curr_layers = np.random.choice(colors, size=2, replace=False)
+        center = (box.c + box.size / 2, box.r + box.size / 2)
+        layers[curr_layers[0]].append(tile.translate(*center))
+        layers[curr_layers[1]].append(highlight.translate(*center))
+    return [PathSet.concatenate(layer).to_drawing() for layer in layers]
 
 
 @click.command()
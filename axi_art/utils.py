@@ -4,8 +4,12 @@ import string
 import axi
 import numpy as np
 
+from axi_art.pathset import PathSet
+
 
 def offset_paths(paths, off_x, off_y):
+    if isinstance(paths, PathSet):
+        return paths.translate(off_x, off_y)
     return [[(p[0] + off_x, p[1] + off_y) for p in path] for path in paths]
 
 
@@ -17,32 +21,71 @@ def map_range(val, a0, a1, b0, b1):
 class Font(object):
     def __init__(self, font, point_size):
         self.font = font
-        self.max_height = axi.Drawing(axi.text(string.printable, font)).height
+        # Per-character metrics and glyph paths, indexed by ord(char) - 32 as in axi.text
+        self.advances = np.array([rt - lt for lt, rt, _ in font], dtype=float)
+        self.glyphs = [
+            PathSet.from_paths([[(i - lt, j) for i, j in p] for p in coords if p])
+            for lt, _, coords in font
+        ]
+        self.has_ink = np.array([len(glyph.coords) > 0 for glyph in self.glyphs])
+        self.extents = np.array([glyph.bounds for glyph in self.glyphs])
+        _, _, bounds = self._layout(string.printable)
+        self.max_height = bounds[3] - bounds[1]
         # self.cap_height = axi.Drawing(axi.text('H', font)).height
         height = point_size / 72
         self.scale = height / self.max_height
 
-    def text(self, text):
-        d = axi.Drawing(axi.text(text, self.font))
-        d = d.scale(self.scale)
-        return d
+    def _layout(self, text, extra=0):
+        """
+        Place each character of a line of text the way axi.text does.
+        Args:
+            text: The text
+            extra: Extra space added after each space character
+
+        Returns: The glyph index and x offset of every character with a glyph, and the ink bounds
+        (min_x, min_y, max_x, max_y) of the whole line in font units, all 0 if there is no ink
+        """
+        indices = np.array([ord(c) - 32 for c in text], dtype=int)
+        indices = indices[(indices >= 0) & (indices < len(self.glyphs))]
+        steps = self.advances[indices] + extra * (indices == 0)
+        xs = np.cumsum(steps) - steps
+        ink = self.has_ink[indices]
+        if not ink.any():
+            return indices, xs, np.zeros(4)
+        extents = self.extents[indices[ink]]
+        extents[:, [0, 2]] += xs[ink, None]
+        bounds = np.concatenate(
+            (extents[:, :2].min(axis=0), extents[:, 2:].max(axis=0))
+        )
+        return indices, xs, bounds
+
+    def text(self, text, extra=0):
+        indices, xs, _ = self._layout(text, extra)
+        glyphs = PathSet.concatenate(
+            [
+                self.glyphs[i].translate(x, 0)
+                for i, x in zip(indices, xs)
+                if self.has_ink[i]
+            ]
+        )
+        return glyphs.scale(self.scale).to_drawing()
 
     def justify_text(self, text, width):
-        d = self.text(text)
-        w = d.width
+        w, _ = self.measure(text)
         spaces = text.count(" ")
         if spaces == 0 or w >= width:
-            return d
+            return self.text(text)
         e = ((width - w) / spaces) / self.scale
-        d = axi.Drawing(axi.text(text, self.font, extra=e))
-        d = d.scale(self.scale)
-        return d
+        return self.text(text, extra=e)
 
     def measure(self, text):
-        return self.text(text).size
+        _, _, bounds = self._layout(text)
+        return (bounds[2] - bounds[0]) * self.scale, (
+            bounds[3] - bounds[1]
+        ) * self.scale
 
-    def wrap(self, text, width, line_spacing=1, align=0, justify=False):
-        lines = self.word_wrap(text, width, self.measure)
+    def wrap(self, text, width, line_spacing=1, align=0, justify=False, balanced=False):
+        lines = self.word_wrap(text, width, balanced)
         ds = [self.text(line) for line in lines]
         max_width = max(d.width for d in ds)
         if justify:
@@ -62,49 +105,143 @@ class Font(object):
             y += spacing
         return result
 
-    @staticmethod
-    def word_wrap(text, width, measure_func):
+    def word_ink(self, fields):
+        """
+        Ink extents of alternating word and whitespace fields laid out as one line.
+        Args:
+            fields: Word, whitespace, word, ... strings
+
+        Returns: Arrays of where the ink of each word starts and ends, in font units from the start of the line.
+        Words without ink start at inf and end at -inf.
+        """
+        codes = np.array([ord(c) - 32 for field in fields for c in field], dtype=int)
+        valid = (codes >= 0) & (codes < len(self.glyphs))
+        codes = np.where(valid, codes, 0)
+        steps = np.where(valid, self.advances[codes], 0)
+        xs = np.cumsum(steps) - steps
+        ink = valid & self.has_ink[codes]
+        lefts = np.where(ink, xs + self.extents[codes, 0], np.inf)
+        rights = np.where(ink, xs + self.extents[codes, 2], -np.inf)
+        starts = np.cumsum([0] + [len(field) for field in fields[:-1]])
+        return (
+            np.minimum.reduceat(lefts, starts)[::2],
+            np.maximum.reduceat(rights, starts)[::2],
+        )
+
+    def word_wrap(self, text, width, balanced=False):
+        """
+        Break text into lines no wider than width, measuring every word once.
+        Args:
+            text: The text, with newlines forcing breaks
+            width: Maximum width of a line
+            balanced: Minimise the raggedness of the lines instead of filling each one greedily
+
+        Returns: The lines of text
+        """
         result = []
         for line in text.split("\n"):
             fields = itertools.groupby(line, lambda x: x.isspace())
             fields = ["".join(g) for _, g in fields]
+            if fields and fields[0].isspace():
+                fields = fields[1:]
+            if len(fields) == 0:
+                # A line of only whitespace is kept as a blank line, an empty one is dropped
+                if line:
+                    result.append("")
+                continue
             if len(fields) % 2 == 1:
-                fields.append("")
-            x = ""
-            for a, b in zip(fields[::2], fields[1::2]):
-                w, _ = measure_func(x + a)
-                if w > width:
-                    if x == "":
-                        result.append(a)
-                        continue
-                    else:
-                        result.append(x)
-                        x = ""
-                x += a + b
-            if x != "":
-                result.append(x)
+                fields.append(" ")
+            lefts, rights = self.word_ink(fields)
+            for start, end in break_lines(lefts, rights, width / self.scale, balanced):
+                result.append("".join(fields[2 * start : 2 * end - 1]))
         result = [x.strip() for x in result]
         return result
 
 
-def vertical_stack(ds, spacing=0, center=True):
+def break_lines(lefts, rights, width, balanced=False):
+    """
+    Choose where to break a paragraph of words into lines. A line's width runs from the leftmost to the rightmost
+    ink of its words, kept up to date as words are added, so nothing is measured twice. A word wider than a line
+    gets a line to itself.
+    Args:
+        lefts: Where the ink of each word starts, measured along the unbroken paragraph
+        rights: Where the ink of each word ends
+        width: Maximum width of a line
+        balanced: Minimise the sum of the squared space left at the end of every line but the last, as in
+            Knuth and Plass's minimum raggedness, instead of filling each line greedily
+
+    Returns: List of (first word, last word + 1) ranges, one per line
+    """
+    n = len(lefts)
+    if not balanced:
+        lines = []
+        start = 0
+        left, right = np.inf, -np.inf
+        for k in range(n):
+            new_left, new_right = min(left, lefts[k]), max(right, rights[k])
+            if max(new_right - new_left, 0) > width:
+                if start == k:
+                    lines.append((k, k + 1))
+                    start = k + 1
+                    continue
+                lines.append((start, k))
+                start = k
+                new_left, new_right = lefts[k], rights[k]
+            left, right = new_left, new_right
+        if start < n:
+            lines.append((start, n))
+        return lines
+    # best[i] is the lowest cost of setting words i onwards, ending the first line before word ends[i]
+    best = np.full(n + 1, np.inf)
+    best[n] = 0
+    ends = np.zeros(n + 1, dtype=int)
+    for i in range(n - 1, -1, -1):
+        left, right = np.inf, -np.inf
+        for j in range(i, n):
+            left, right = min(left, lefts[j]), max(right, rights[j])
+            line_width = max(right - left, 0)
+            if line_width > width and j > i:
+                break
+            slack = max(width - line_width, 0)
+            cost = best[j + 1] + (0 if j == n - 1 else slack**2)
+            if cost < best[i]:
+                best[i] = cost
+                ends[i] = j + 1
+    lines = []
+    start = 0
+    while start < n:
+        lines.append((start, ends[start]))
+        start = ends[start]
+    return lines
+
+
+def _combine(ds):
+    if ds and all(isinstance(d, PathSet) for d in ds):
+        return PathSet.concatenate(ds)
     result = axi.Drawing()
+    for d in ds:
+        result.add(d if isinstance(d, axi.Drawing) else d.to_drawing())
+    return result
+
+
+def vertical_stack(ds, spacing=0, center=True):
+    placed = []
     y = 0
     for d in ds:
         if center:
             d = d.origin().translate(-d.width / 2, y)
         else:
             d = d.origin().translate(0, y)
-        result.add(d)
+        placed.append(d)
         y += d.height + spacing
-    return result
+    return _combine(placed)
 
 
 def horizontal_stack(ds, spacing=0):
-    result = axi.Drawing()
+    placed = []
     x = 0
     for d in ds:
         d = d.origin().translate(x, -d.height / 2)
-        result.add(d)
+        placed.append(d)
         x += d.width + spacing
-    return result
+    return _combine(placed)
@@ -1,7 +1,9 @@
 import axi
+import numpy as np
 from PIL import Image
 from axi import Drawing
 
+from axi_art.pathset import PathSet
 from axi_art.utils import Font
 
 
@@ -13,34 +15,51 @@ def map(val: float, lo0: float, hi0: float, lo1: float, hi1: float):
 def letter_grid(
     font0, font1, mask: Image, text: str, width: float, height: float
 ) -> list[Drawing]:
-    letters_a: dict[str, Drawing] = {c: font0.text(c) for c in set(text)}
-    letters_b: dict[str, Drawing] = {c: font1.text(c) for c in set(text)}
-    row_height = 1.3 * max(d.height for d in letters_b.values())
-    out = [Drawing(), Drawing()]
+    """
+    Fill a rectangle with rows of repeating text, drawing each letter in font0 where the mask is light and font1
+    where it's dark. Letters are placed from cached glyph arrays and each layer is assembled once at the end.
+    Args:
+        font0: Font for letters over light parts of the mask, drawn in layer 1
+        font1: Font for letters over dark parts of the mask, drawn in layer 0
+        mask: Image stretched over the rectangle
+        text: Text to repeat, each row starting one character further along
+        width: Width of the rectangle
+        height: Height of the rectangle
+
+    Returns: The two layers
+    """
+    letters = [
+        {c: font.text(c) for c in set(text) if c != " "} for font in (font0, font1)
+    ]
+    glyphs = [{c: PathSet.from_drawing(d) for c, d in fl.items()} for fl in letters]
+    widths = [{c: d.width for c, d in fl.items()} for fl in letters]
+    heights = [{c: d.height for c, d in fl.items()} for fl in letters]
+    row_height = 1.3 * max(heights[1].values())
+    pixels = np.asarray(mask.convert("L")) > 127
+    mask_height, mask_width = pixels.shape
+    placed = [[], []]
     y = 0
     row_count = 0
     while y < height:
-        x = -row_height/2
+        x = -row_height / 2
         i = row_count % len(text)
         while x < width:
             if (c := text[i]) != " ":
-                d = letters_a[c].translate(x, y)
-                try:
-                    mask_x = int(map(x + d.width / 2, 0, width, 0, mask.size[0]))
-                    mask_y = int(map(y + d.height / 2, 0, height, 0, mask.size[1]))
-                    layer = mask.getpixel((mask_x, mask_y)) > 127
-                    if not layer:
-                        d = letters_b[c].translate(x, y)
-                except IndexError:
+                mask_x = int(map(x + widths[0][c] / 2, 0, width, 0, mask_width))
+                mask_y = int(map(y + heights[0][c] / 2, 0, height, 0, mask_height))
+                if 0 <= mask_x < mask_width and 0 <= mask_y < mask_height:
+                    layer = int(pixels[mask_y, mask_x])
+                else:
                     layer = 1
-                out[layer] = Drawing.combine([out[layer], d])
-                x += 1.3 * d.width
+                font = 0 if layer else 1
+                placed[layer].append(glyphs[font][c].translate(x, y))
+                x += 1.3 * widths[font][c]
             else:
                 x += 0.3 * row_height
             i = (i + 1) % len(text)
         y += row_height
         row_count += 1
-    return out
+    return [PathSet.concatenate(layer).to_drawing() for layer in placed]
 
 
 def rect(x: float, y: float, w: float, h: float) -> Drawing: